@@ -21,121 +21,833 @@ fuel_station.open_fuel_slot(“electric”) -> false (only 1 slot available at f
 Explanation of the Code:
 
 1. Class Initialization (__init__ method):
-   - The constructor takes three arguments (diesel, petrol, and electric), representing the number of fuel slots available for each type of vehicle.
-   - The self.parking dictionary stores the current state of fuel slots. The key is the fuel type ("diesel", "petrol", "electric"), and the value is a list where the first element is the number of filled slots and the second element is the total available slots.
+   - The constructor takes the number of fuel slots for each fuel type (diesel, petrol and electric, plus any other fuel type passed as a keyword argument, e.g. hydrogen=2).
+   - Each fuel type is mapped to an integer index once, so the per-call bookkeeping is done with list and array lookups instead of repeated string-keyed dictionary lookups.
+   - Every slot has an ID (1, 2, 3, ...), numbered fuel type by fuel type. The slot IDs of each fuel type occupy one segment of the `slots` array: the occupied slots first, then the free ones. `filled` holds the number of occupied slots per fuel type, so the first free slot of a fuel type is always at `base + filled`.
 
 2. fuel_vehicle method:
-   - This method is used to fuel a vehicle. It checks whether there is an available slot for the specified fuel type. If there is, it increments the count of filled slots for that fuel type and returns True. Otherwise, it returns False.
+   - This method is used to fuel a vehicle. If the fuel type has a free slot, the first free slot of its segment becomes occupied (by the given vehicle, if any) and its slot ID is returned. Otherwise, it returns False.
 
-3. open_fuel_slot method:
-   - This method is used when a vehicle leaves the station and frees up a fuel slot. It checks if there are any vehicles occupying slots of the specified fuel type. If there are, it decrements the filled slot count and returns True. If no vehicles are occupying slots for that fuel type, it returns False.
+3. open_fuel_slot, release_vehicle and release_slot methods:
+   - These methods free a slot when a vehicle leaves the station. open_fuel_slot frees one occupied slot of a fuel type (the last one in its segment), release_vehicle frees the slot of a given vehicle and release_slot frees a given slot. A freed slot is swapped with the last occupied slot of its segment (using `position` to find it), so the occupied slots stay at the front of the segment. They return False if there is nothing to release.
 
-4. Test Cases:
+4. Lookups:
+   - slot_of returns the slot of a vehicle (through the `vehicle_slot` dictionary) and vehicle_at returns the vehicle at a slot.
+
+5. Test Cases:
    - Various test cases are used to simulate the fueling process, including attempts to fuel vehicles when no slots are available and releasing fuel slots when vehicles leave.
 
+6. Waiting for a slot (ConcurrentFuelStation):
+   - ConcurrentFuelStation guards every method with a lock, so it can be shared between threads (and event loops).
+   - Instead of calling fuel_vehicle until it stops returning False, a caller can wait for a slot with wait_for_slot (blocking, for threads) or async_wait_for_slot (for asyncio), with an optional timeout.
+   - Waiters queue up per fuel type in FIFO order. When a slot is released and someone is waiting for its fuel type, the slot is handed directly to the first waiter instead of being freed, so a newly arriving vehicle can never take it first.
+
+7. Many stations (FuelNetwork):
+   - FuelNetwork owns many stations, each optionally in a zone, and keeps an index of free capacity per (zone, fuel type) and per fuel type across all zones.
+   - Every station reports changes of its free slots through its `listener`, so the index stays up to date whether slots are taken through the network or directly on a station.
+   - Each index is a pair of heaps: stations by number of free slots (for the least-loaded station) and stations with a free slot by station ID (for the first available one). Heap entries are not removed when a station changes; a new entry is pushed instead and outdated entries are skipped when they reach the top, and the heaps are rebuilt once they hold too many outdated entries. Reserving a slot therefore costs O(log n) amortized for n stations, instead of trying every station in turn.
+
+8. Simulation (simulate and sweep):
+   - simulate replays a whole trace of arrivals (arrival time, fuel type, service duration) through an empty station in one pass, without calling fuel_vehicle and open_fuel_slot for every vehicle.
+   - Arrivals are taken in time order (ties in trace order). Each fuel type keeps a heap of the departure times of its occupied slots; before an arrival, every departure at or before its time is taken off the heap (so a slot freed at time t can be taken by a vehicle arriving at time t), and the vehicle is accepted if fewer than `capacity` slots are still occupied. This is exactly what replaying the trace through FuelStation with the departures ordered first would decide, in O(n log c) for n arrivals and c slots per fuel type.
+   - The result holds the accept/reject decision of every arrival, the rejection rate and utilization of each fuel type, and the number of occupied slots over time.
+   - simulate is still a Python loop over the arrivals, since every decision depends on the ones before it; it only saves the method calls and bookkeeping of FuelStation. `benchmarks.py fuel-simulate` measures 1.3-1.5x over replaying the trace through FuelStation (e.g. 1.5 s against 2.3 s for a million arrivals), so a trace that takes minutes to replay still takes minutes to simulate. Running many configurations is what sweep speeds up, by about the number of processes.
+   - sweep simulates the same trace for many slot counts in parallel on a process pool; the trace is sent to each worker once, not once per slot count.
+
 Time and Space Complexity:
-- Time Complexity: Each method (fuel_vehicle and open_fuel_slot) performs constant time operations. Checking and updating the self.parking dictionary are O(1) operations, so the overall time complexity for each operation is O(1).
-- Space Complexity: The space complexity is O(3) because the dictionary contains three keys for the three fuel types, and each key holds a list with two values. Since the dictionary size is constant, the space complexity is O(1).
+- Time Complexity: Each method performs a constant number of array, list and dictionary operations and never scans the slots, so every operation is O(1), however many slots the station has.
+- Space Complexity: O(n), where n is the total number of slots: a few array entries per slot, plus one dictionary entry per vehicle at the station.
 """
 
+import asyncio
+import heapq
+import multiprocessing
+import threading
+from array import array
+from collections import deque
+from functools import partial
+from typing import Hashable, Optional, Union
+
+
 class FuelStation:
     """
-    The FuelStation class simulates a fuel station with specific slots for each type of vehicle: Diesel, Petrol, and Electric.
-    - It allows fueling vehicles and managing available slots.
-    - The parking dictionary keeps track of how many vehicles are currently in the slots (the first number in each list) 
-      and the total capacity of slots for each fuel type (the second number in each list).
+    The FuelStation class simulates a fuel station with a fixed number of slots for each type of vehicle (Diesel, Petrol, Electric, and any other fuel type).
+    - It allows fueling vehicles, releasing slots, and looking up which slot a vehicle is at.
+    - Slots have IDs starting at 1. The slots of each fuel type form one segment of the `slots` array, with the occupied slots first,
+      so fueling and releasing are O(1) array swaps rather than scans.
     """
 
-    def __init__(self, diesel: int, petrol: int, electric: int):
+    def __init__(self, diesel: int = 0, petrol: int = 0, electric: int = 0, **other_fuel_types: int):
         """
-        Initializes the FuelStation with a given number of slots for diesel, petrol, and electric vehicles.
+        Initializes the FuelStation with a given number of slots for each fuel type.
         Arguments:
             diesel -- the number of diesel fuel slots available
             petrol -- the number of petrol fuel slots available
             electric -- the number of electric fuel slots available
+            other_fuel_types -- the number of slots of any other fuel type, e.g. hydrogen=2
         """
-        self.parking = {
-            "diesel": [0, diesel],   # [current filled slots, total available slots for diesel]
-            "petrol": [0, petrol],   # [current filled slots, total available slots for petrol]
-            "electric": [0, electric] # [current filled slots, total available slots for electric]
-        }
+        capacities = {"diesel": diesel, "petrol": petrol, "electric": electric, **other_fuel_types}
+        self.fuel_types = {name: index for index, name in enumerate(capacities)}  # Fuel type name -> index
+        self.fuel_type_names = list(capacities)  # Fuel type index -> name
+        self.capacity = list(capacities.values())  # Total slots per fuel type
+        self.filled = [0] * len(capacities)  # Occupied slots per fuel type
+        self.base = []  # Start of each fuel type's segment in `slots`
+        total = 0
+        for capacity in self.capacity:
+            self.base.append(total)
+            total += capacity
+        self.slots = array("l", range(1, total + 1))  # Slot IDs; per segment, occupied first, then free
+        self.position = array("l", range(-1, total))  # Slot ID -> its index in `slots` (index 0 is unused)
+        self.slot_type = array("l", [0])  # Slot ID -> fuel type index
+        for index, capacity in enumerate(self.capacity):
+            self.slot_type.extend([index] * capacity)
+        self.vehicle_at_slot = [None] * (total + 1)  # Slot ID -> vehicle ID (None if free or anonymous)
+        self.vehicle_slot = {}  # Vehicle ID -> slot ID
+        self.listener = None  # Optional callable(station, fuel type index), called when a fuel type's free slots change
 
-    def fuel_vehicle(self, carType: str) -> bool:
+    @property
+    def parking(self) -> dict:
         """
-        Attempts to fuel a vehicle of a given type (diesel, petrol, or electric).
+        The current state of each fuel type as [current filled slots, total available slots].
+        """
+        return {name: [self.filled[index], self.capacity[index]] for name, index in self.fuel_types.items()}
+
+    def fuel_vehicle(self, carType: str, vehicle_id: Optional[Hashable] = None) -> Union[int, bool]:
+        """
+        Attempts to fuel a vehicle of a given fuel type.
         Arguments:
-            carType -- the type of fuel needed for the vehicle (either "diesel", "petrol", or "electric")
+            carType -- the type of fuel needed for the vehicle (e.g. "diesel", "petrol", or "electric")
+            vehicle_id -- an optional ID of the vehicle, used to release or look up its slot later
         Returns:
-            bool -- True if the vehicle is successfully fueled (i.e., there was an available slot), False otherwise.
-        """
-        # The new total of vehicles in the specified slot is the current filled slots + 1
-        new_total = self.parking[carType][0] + 1
-        
-        # Check if there is space available in the specified fuel type
-        if new_total <= self.parking[carType][1]:
-            # If there is space, increment the current filled slots
-            self.parking[carType][0] += 1
-            return True  # Vehicle is fueled successfully
-        return False  # No available slots, cannot fuel the vehicle
+            int or bool -- the slot ID (1 or more) if the vehicle is fueled, False if there was no free slot
+                           (or the vehicle is already at the station).
+        """
+        index = self.fuel_types[carType]
+        if self.filled[index] >= self.capacity[index]:
+            return False  # No available slots, cannot fuel the vehicle
+        if vehicle_id is not None and vehicle_id in self.vehicle_slot:
+            return False  # The vehicle is already at a slot
+        return self._occupy(index, vehicle_id)
 
     def open_fuel_slot(self, carType: str) -> bool:
         """
-        Frees up a fuel slot of the given fuel type when a vehicle leaves the station.
+        Frees up an occupied fuel slot of the given fuel type (the last one in its segment) when a vehicle leaves the station.
         Arguments:
-            carType -- the type of fuel for which the slot is being freed (either "diesel", "petrol", or "electric")
+            carType -- the type of fuel for which the slot is being freed (e.g. "diesel", "petrol", or "electric")
         Returns:
             bool -- True if the slot is successfully opened (i.e., a vehicle has left), False if no slots were filled initially.
         """
+        index = self.fuel_types[carType]
         # Check if there are any vehicles occupying the fuel type slot
-        if self.parking[carType][0] <= 0:
-            # If no vehicles are occupying, return False
+        if self.filled[index] <= 0:
             return False
-        # If there are vehicles occupying, decrement the number of filled slots
-        self.parking[carType][0] -= 1
+        self._release(self.slots[self.base[index] + self.filled[index] - 1])
         return True  # Fuel slot has been successfully opened
 
-# Example of how to use the FuelStation class
+    def release_vehicle(self, vehicle_id: Hashable) -> bool:
+        """
+        Frees up the slot of a vehicle when it leaves the station.
+        Arguments:
+            vehicle_id -- the ID the vehicle was fueled with
+        Returns:
+            bool -- True if the slot is freed, False if the vehicle is not at the station.
+        """
+        slot = self.vehicle_slot.get(vehicle_id)
+        if slot is None:
+            return False
+        self._release(slot)
+        return True
 
-# Initialize a fuel station with 2 diesel, 2 petrol, and 1 electric slot
-fuel_station = FuelStation(diesel=2, petrol=2, electric=1)
+    def release_slot(self, slot: int) -> bool:
+        """
+        Frees up a slot by its ID.
+        Arguments:
+            slot -- the slot ID returned by fuel_vehicle
+        Returns:
+            bool -- True if the slot is freed, False if it is not an occupied slot.
+        """
+        if not 0 < slot < len(self.position):
+            return False
+        index = self.slot_type[slot]
+        if self.position[slot] >= self.base[index] + self.filled[index]:
+            return False  # The slot is already free
+        self._release(slot)
+        return True
+
+    def slot_of(self, vehicle_id: Hashable) -> Optional[int]:
+        """
+        Returns the slot ID of a vehicle, or None if it is not at the station.
+        """
+        return self.vehicle_slot.get(vehicle_id)
+
+    def vehicle_at(self, slot: int) -> Optional[Hashable]:
+        """
+        Returns the ID of the vehicle at a slot, or None if the slot is free or its vehicle was fueled without an ID.
+        """
+        return self.vehicle_at_slot[slot] if 0 < slot < len(self.vehicle_at_slot) else None
+
+    def _occupy(self, index: int, vehicle_id: Optional[Hashable]) -> int:
+        """
+        Occupies the first free slot of a fuel type, which must have one, and returns its ID.
+        """
+        slot = self.slots[self.base[index] + self.filled[index]]
+        self.filled[index] += 1
+        self.vehicle_at_slot[slot] = vehicle_id
+        if vehicle_id is not None:
+            self.vehicle_slot[vehicle_id] = slot
+        if self.listener is not None:
+            self.listener(self, index)
+        return slot
+
+    def _release(self, slot: int) -> None:
+        """
+        Frees an occupied slot by swapping it with the last occupied slot of its segment.
+        """
+        index = self.slot_type[slot]
+        self.filled[index] -= 1
+        last = self.base[index] + self.filled[index]
+        slots = self.slots
+        position = self.position
+        moved = slots[last]
+        here = position[slot]
+        slots[here], slots[last] = moved, slot
+        position[moved], position[slot] = here, last
+        vehicle_id = self.vehicle_at_slot[slot]
+        if vehicle_id is not None:
+            del self.vehicle_slot[vehicle_id]
+            self.vehicle_at_slot[slot] = None
+        if self.listener is not None:
+            self.listener(self, index)
+
+
+class _Waiter:
+    """
+    A caller waiting for a slot: a thread (woken through `event`) or a coroutine (woken through `future` on `loop`).
+    """
+
+    __slots__ = ("vehicle_id", "slot", "event", "loop", "future")
+
+    def __init__(self, vehicle_id: Optional[Hashable], event=None, loop=None, future=None):
+        self.vehicle_id = vehicle_id
+        self.slot = None  # Set to the slot ID once a slot has been handed over
+        self.event = event
+        self.loop = loop
+        self.future = future
+
+    def wake(self, slot: int) -> None:
+        """
+        Hands a slot to the waiter and wakes it up.
+        """
+        self.slot = slot
+        if self.event is not None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(_resolve, self.future, slot)
+
+
+def _resolve(future: asyncio.Future, slot: int) -> None:
+    """
+    Completes an async waiter's future, unless the waiter has already given up.
+    """
+    if not future.done():
+        future.set_result(slot)
+
+
+class ConcurrentFuelStation(FuelStation):
+    """
+    A thread-safe FuelStation where callers can wait for a slot instead of polling fuel_vehicle.
+    - Every method runs under one lock.
+    - Waiters queue up per fuel type (FIFO). A released slot is handed directly to the first waiter of its fuel type.
+    """
+
+    def __init__(self, diesel: int = 0, petrol: int = 0, electric: int = 0, **other_fuel_types: int):
+        """
+        Initializes the station; the arguments are the same as for FuelStation.
+        """
+        super().__init__(diesel, petrol, electric, **other_fuel_types)
+        self.lock = threading.Lock()
+        self.waiters = [deque() for _ in self.capacity]  # Per fuel type, the waiters in arrival order
+        self.waiting_vehicles = set()  # IDs of the vehicles that are waiting
+
+    @property
+    def parking(self) -> dict:
+        """
+        Thread-safe version of FuelStation.parking.
+        """
+        with self.lock:
+            return super().parking
+
+    def fuel_vehicle(self, carType: str, vehicle_id: Optional[Hashable] = None) -> Union[int, bool]:
+        """
+        Thread-safe version of FuelStation.fuel_vehicle.
+        """
+        with self.lock:
+            if vehicle_id is not None and vehicle_id in self.waiting_vehicles:
+                return False
+            return super().fuel_vehicle(carType, vehicle_id)
+
+    def open_fuel_slot(self, carType: str) -> bool:
+        """
+        Thread-safe version of FuelStation.open_fuel_slot.
+        """
+        with self.lock:
+            return super().open_fuel_slot(carType)
+
+    def release_vehicle(self, vehicle_id: Hashable) -> bool:
+        """
+        Thread-safe version of FuelStation.release_vehicle.
+        """
+        with self.lock:
+            return super().release_vehicle(vehicle_id)
+
+    def release_slot(self, slot: int) -> bool:
+        """
+        Thread-safe version of FuelStation.release_slot.
+        """
+        with self.lock:
+            return super().release_slot(slot)
+
+    def slot_of(self, vehicle_id: Hashable) -> Optional[int]:
+        """
+        Thread-safe version of FuelStation.slot_of.
+        """
+        with self.lock:
+            return super().slot_of(vehicle_id)
+
+    def vehicle_at(self, slot: int) -> Optional[Hashable]:
+        """
+        Thread-safe version of FuelStation.vehicle_at.
+        """
+        with self.lock:
+            return super().vehicle_at(slot)
+
+    def wait_for_slot(
+        self, carType: str, vehicle_id: Optional[Hashable] = None, timeout: Optional[float] = None
+    ) -> Union[int, bool]:
+        """
+        Fuels a vehicle, blocking the calling thread until a slot of its fuel type is free.
+        Arguments:
+            carType -- the type of fuel needed for the vehicle
+            vehicle_id -- an optional ID of the vehicle, used to release or look up its slot later
+            timeout -- the longest time to wait in seconds (None waits indefinitely)
+        Returns:
+            int or bool -- the slot ID, or False if the timeout expired (or the vehicle is already at the station or waiting).
+        """
+        waiter = self._enqueue(carType, vehicle_id, event=threading.Event())
+        if not isinstance(waiter, _Waiter):
+            return waiter  # A slot was free, or the call was refused
+        if waiter.event.wait(timeout):
+            return waiter.slot
+        return self._give_up(carType, waiter)
+
+    async def async_wait_for_slot(
+        self, carType: str, vehicle_id: Optional[Hashable] = None, timeout: Optional[float] = None
+    ) -> Union[int, bool]:
+        """
+        Fuels a vehicle, suspending the calling coroutine until a slot of its fuel type is free.
+        If the coroutine is cancelled after a slot was handed to it, the slot is released again.
+        Arguments:
+            carType -- the type of fuel needed for the vehicle
+            vehicle_id -- an optional ID of the vehicle, used to release or look up its slot later
+            timeout -- the longest time to wait in seconds (None waits indefinitely)
+        Returns:
+            int or bool -- the slot ID, or False if the timeout expired (or the vehicle is already at the station or waiting).
+        """
+        loop = asyncio.get_running_loop()
+        waiter = self._enqueue(carType, vehicle_id, loop=loop, future=loop.create_future())
+        if not isinstance(waiter, _Waiter):
+            return waiter
+        try:
+            return await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+        except asyncio.TimeoutError:
+            return self._give_up(carType, waiter)
+        except asyncio.CancelledError:
+            if self._give_up(carType, waiter):
+                self.release_slot(waiter.slot)
+            raise
+
+    def _enqueue(self, carType: str, vehicle_id: Optional[Hashable], **wake_up) -> Union[_Waiter, int, bool]:
+        """
+        Occupies a free slot right away if there is one and nobody is waiting for it; otherwise queues a waiter.
+        Returns:
+            the slot ID, False if the vehicle is already at the station or waiting, or the queued waiter.
+        """
+        with self.lock:
+            index = self.fuel_types[carType]
+            if vehicle_id is not None and (vehicle_id in self.vehicle_slot or vehicle_id in self.waiting_vehicles):
+                return False
+            if not self.waiters[index] and self.filled[index] < self.capacity[index]:
+                return self._occupy(index, vehicle_id)
+            waiter = _Waiter(vehicle_id, **wake_up)
+            self.waiters[index].append(waiter)
+            if vehicle_id is not None:
+                self.waiting_vehicles.add(vehicle_id)
+            return waiter
+
+    def _give_up(self, carType: str, waiter: _Waiter) -> Union[int, bool]:
+        """
+        Removes a waiter whose wait ended without being woken. Returns its slot if one was handed over in the meantime,
+        otherwise False.
+        """
+        with self.lock:
+            if waiter.slot is not None:
+                return waiter.slot
+            self.waiters[self.fuel_types[carType]].remove(waiter)
+            self.waiting_vehicles.discard(waiter.vehicle_id)
+            return False
+
+    def _release(self, slot: int) -> None:
+        """
+        Hands a released slot to the first waiter of its fuel type, or frees it if nobody is waiting.
+        """
+        waiters = self.waiters[self.slot_type[slot]]
+        if not waiters:
+            super()._release(slot)
+            return
+        waiter = waiters.popleft()
+        previous = self.vehicle_at_slot[slot]
+        if previous is not None:
+            del self.vehicle_slot[previous]
+        self.vehicle_at_slot[slot] = waiter.vehicle_id
+        if waiter.vehicle_id is not None:
+            self.waiting_vehicles.discard(waiter.vehicle_id)
+            self.vehicle_slot[waiter.vehicle_id] = slot
+        waiter.wake(slot)
+
+
+class _CapacityIndex:
+    """
+    The free slots of one fuel type over a group of stations, ordered two ways with lazily cleaned heaps:
+    - `by_free` holds (-free slots, station ID), so its top is the station with the most free slots.
+    - `by_id` holds the IDs of stations with a free slot, so its top is the first available station.
+    An entry is current only if it matches `free`; outdated entries are skipped when they reach the top.
+    """
+
+    def __init__(self):
+        self.free = {}  # Station ID -> free slots
+        self.total = 0  # Free slots over all stations
+        self.by_free = []
+        self.by_id = []
+
+    def update(self, station_id: int, free: int) -> None:
+        """
+        Records the current number of free slots of a station.
+        """
+        self.total += free - self.free.get(station_id, 0)
+        self.free[station_id] = free
+        heapq.heappush(self.by_free, (-free, station_id))
+        if free:
+            heapq.heappush(self.by_id, station_id)
+        if len(self.by_free) + len(self.by_id) > 4 * len(self.free) + 64:
+            self._rebuild()
+
+    def least_loaded(self) -> Optional[int]:
+        """
+        Returns the ID of the station with the most free slots (the lowest ID on ties), or None if all are full.
+        """
+        by_free = self.by_free
+        free = self.free
+        while by_free:
+            negative_free, station_id = by_free[0]
+            if free[station_id] == -negative_free:
+                return station_id if negative_free else None
+            heapq.heappop(by_free)
+        return None
+
+    def first_available(self) -> Optional[int]:
+        """
+        Returns the lowest ID of a station with a free slot, or None if all are full.
+        """
+        by_id = self.by_id
+        free = self.free
+        while by_id:
+            if free[by_id[0]]:
+                return by_id[0]
+            heapq.heappop(by_id)
+        return None
+
+    def _rebuild(self) -> None:
+        """
+        Rebuilds both heaps from the current free slots, dropping outdated entries.
+        """
+        self.by_free = [(-free, station_id) for station_id, free in self.free.items()]
+        heapq.heapify(self.by_free)
+        self.by_id = [station_id for station_id, free in self.free.items() if free]
+        heapq.heapify(self.by_id)
+
+
+class FuelNetwork:
+    """
+    The FuelNetwork class manages many fuel stations, optionally grouped into zones, and finds a free slot of a fuel type in
+    O(log n) for n stations through an index of free capacity per (zone, fuel type).
+    - Stations keep working on their own: slots taken or released directly on a station also update the index.
+    - Stations are identified by the ID returned by add_station (0, 1, 2, ...).
+    """
+
+    LEAST_LOADED = "least_loaded"  # Reserve at the station with the most free slots
+    FIRST_AVAILABLE = "first_available"  # Reserve at the station with the lowest ID that has a free slot
+
+    def __init__(self):
+        """
+        Initializes an empty network.
+        """
+        self.stations = []  # Station ID -> station
+        self.zones = []  # Station ID -> zone (None if the station has no zone)
+        self.indexes = {}  # (zone, fuel type) -> _CapacityIndex; zone None covers every station
+
+    def add_station(self, station: FuelStation, zone: Optional[Hashable] = None) -> int:
+        """
+        Adds a station to the network.
+        Arguments:
+            station -- the station; the network becomes its listener
+            zone -- an optional zone (e.g. a region name) the station belongs to
+        Returns:
+            int -- the station ID
+        """
+        station_id = len(self.stations)
+        self.stations.append(station)
+        self.zones.append(zone)
+        station.listener = partial(self._changed, station_id)
+        for index in station.fuel_types.values():
+            self._changed(station_id, station, index)
+        return station_id
+
+    def free_slots(self, fuel_type: str, zone: Optional[Hashable] = None) -> int:
+        """
+        Returns the number of free slots of a fuel type in a zone (or in the whole network if zone is None).
+        """
+        index = self.indexes.get((zone, fuel_type))
+        return index.total if index is not None else 0
+
+    def reserve(
+        self,
+        fuel_type: str,
+        zone: Optional[Hashable] = None,
+        vehicle_id: Optional[Hashable] = None,
+        policy: str = LEAST_LOADED,
+    ) -> Optional[tuple]:
+        """
+        Fuels a vehicle at a station with a free slot of its fuel type.
+        Arguments:
+            fuel_type -- the type of fuel needed for the vehicle
+            zone -- the zone to look in (None looks in the whole network)
+            vehicle_id -- an optional ID of the vehicle, passed on to the station
+            policy -- LEAST_LOADED (the station with the most free slots) or FIRST_AVAILABLE (the lowest station ID)
+        Returns:
+            tuple or None -- (station ID, slot ID), or None if no station has a free slot (or the station refused the vehicle ID).
+        """
+        station_id = self._pick(fuel_type, zone, policy)
+        if station_id is None:
+            return None
+        slot = self.stations[station_id].fuel_vehicle(fuel_type, vehicle_id)
+        return (station_id, slot) if slot else None
+
+    def reserve_many(
+        self, fuel_type: str, count: int, zone: Optional[Hashable] = None, policy: str = LEAST_LOADED
+    ) -> list:
+        """
+        Reserves `count` slots of a fuel type across the stations of a zone in one call, all or nothing.
+        Each slot goes to the station chosen by `policy` at the time, so LEAST_LOADED spreads the slots across stations
+        while FIRST_AVAILABLE fills stations in ID order.
+        Arguments:
+            fuel_type -- the type of fuel
+            count -- the number of slots to reserve
+            zone -- the zone to look in (None looks in the whole network)
+            policy -- LEAST_LOADED or FIRST_AVAILABLE
+        Returns:
+            list -- the (station ID, slot ID) pairs, or an empty list if fewer than `count` slots are free.
+        """
+        if count <= 0 or self.free_slots(fuel_type, zone) < count:
+            return []
+        return [self.reserve(fuel_type, zone, policy=policy) for _ in range(count)]
+
+    def release(self, station_id: int, slot: int) -> bool:
+        """
+        Frees a slot reserved through the network.
+        Returns:
+            bool -- True if the slot was freed, False if it was not occupied.
+        """
+        return self.stations[station_id].release_slot(slot)
+
+    def _pick(self, fuel_type: str, zone: Optional[Hashable], policy: str) -> Optional[int]:
+        """
+        Returns the ID of the station chosen by `policy`, or None if no station has a free slot.
+        """
+        index = self.indexes.get((zone, fuel_type))
+        if index is None:
+            return None
+        if policy == self.LEAST_LOADED:
+            return index.least_loaded()
+        if policy == self.FIRST_AVAILABLE:
+            return index.first_available()
+        raise ValueError(f"unknown policy {policy!r}")
+
+    def _changed(self, station_id: int, station: FuelStation, index: int) -> None:
+        """
+        Station listener: records the new number of free slots of one fuel type of a station.
+        """
+        fuel_type = station.fuel_type_names[index]
+        free = station.capacity[index] - station.filled[index]
+        zone = self.zones[station_id]
+        for key in ((None, fuel_type), (zone, fuel_type)) if zone is not None else ((None, fuel_type),):
+            capacity_index = self.indexes.get(key)
+            if capacity_index is None:
+                capacity_index = self.indexes[key] = _CapacityIndex()
+            capacity_index.update(station_id, free)
+
+
+class SimulationResult:
+    """
+    The outcome of simulating a trace of arrivals through a station (see simulate).
+    - accepted[i] tells whether arrival i (in trace order) got a slot.
+    - Per fuel type: the number of arrivals and rejections, the busy slot time, and (if recorded) a timeline of the
+      number of occupied slots, as parallel arrays of times and slot counts with one entry per change.
+    """
+
+    def __init__(
+        self,
+        capacities: dict,
+        accepted: list,
+        arrivals: dict,
+        rejected: dict,
+        busy_time: dict,
+        start: float,
+        end: float,
+        timeline: Optional[dict],
+    ):
+        self.capacities = capacities  # Fuel type -> number of slots
+        self.accepted = accepted  # Accept/reject decision per arrival, in trace order
+        self.arrivals = arrivals  # Fuel type -> number of arrivals
+        self.rejected = rejected  # Fuel type -> number of rejected arrivals
+        self.busy_time = busy_time  # Fuel type -> total time its slots were occupied
+        self.start = start  # Time of the first arrival
+        self.end = end  # Time of the last departure
+        self.timeline = timeline  # Fuel type -> (times, occupied slots), or None if not recorded
+
+    @property
+    def rejection_rate(self) -> dict:
+        """
+        The fraction of arrivals that found no free slot, per fuel type.
+        """
+        return {name: self.rejected[name] / count if count else 0.0 for name, count in self.arrivals.items()}
+
+    @property
+    def utilization(self) -> dict:
+        """
+        The average fraction of slots occupied between the first arrival and the last departure, per fuel type.
+        """
+        span = self.end - self.start
+        return {
+            name: self.busy_time[name] / (slots * span) if slots and span > 0 else 0.0
+            for name, slots in self.capacities.items()
+        }
+
+
+def simulate(capacities: dict, arrival_times, fuel_types, durations, timeline: bool = True) -> SimulationResult:
+    """
+    Simulates a trace of arrivals through an empty station with the given slots, in one pass.
+    The decisions are the same as replaying the trace through FuelStation, calling fuel_vehicle on each arrival and
+    open_fuel_slot on each departure, with the departures at a time processed before the arrivals at that time.
+    It is a per-arrival loop like the replay, only about 1.3-1.5x faster (see the module docstring).
+    Arguments:
+        capacities -- fuel type -> number of slots, e.g. {"diesel": 2, "petrol": 2, "electric": 1}
+        arrival_times -- the arrival time of each vehicle (in any order)
+        fuel_types -- the fuel type of each vehicle; every fuel type must be in `capacities`
+        durations -- how long each accepted vehicle occupies its slot
+        timeline -- whether to record the number of occupied slots over time
+    Returns:
+        SimulationResult -- the decisions, rejection rates, utilization and timeline.
+    """
+    names = list(capacities)
+    type_index = {name: index for index, name in enumerate(names)}
+    capacity = [capacities[name] for name in names]
+    types = [type_index[name] for name in fuel_types]  # KeyError for an unknown fuel type, like fuel_vehicle
+    count = len(types)
+    if not len(arrival_times) == len(durations) == count:
+        raise ValueError("arrival_times, fuel_types and durations must have the same length")
+
+    departures = [[] for _ in names]  # Per fuel type: heap of the departure times of its occupied slots
+    arrivals = [0] * len(names)
+    rejected = [0] * len(names)
+    busy_time = [0] * len(names)
+    times = [array("d") for _ in names] if timeline else None
+    occupied = [array("l") for _ in names] if timeline else None
+    accepted = [False] * count
+    heappush = heapq.heappush
+    heappop = heapq.heappop
+    end = None
+
+    for arrival in sorted(range(count), key=arrival_times.__getitem__):
+        time = arrival_times[arrival]
+        index = types[arrival]
+        heap = departures[index]
+        # Free every slot whose vehicle left at or before this arrival
+        while heap and heap[0] <= time:
+            departure = heappop(heap)
+            if timeline:
+                times[index].append(departure)
+                occupied[index].append(len(heap))
+        arrivals[index] += 1
+        if len(heap) >= capacity[index]:
+            rejected[index] += 1
+            continue
+        duration = durations[arrival]
+        heappush(heap, time + duration)
+        busy_time[index] += duration
+        accepted[arrival] = True
+        if end is None or time + duration > end:
+            end = time + duration
+        if timeline:
+            times[index].append(time)
+            occupied[index].append(len(heap))
+
+    if timeline:
+        # Record the departures after the last arrival
+        for index, heap in enumerate(departures):
+            while heap:
+                times[index].append(heappop(heap))
+                occupied[index].append(len(heap))
+
+    start = min(arrival_times) if count else 0
+    return SimulationResult(
+        capacities=dict(zip(names, capacity)),
+        accepted=accepted,
+        arrivals=dict(zip(names, arrivals)),
+        rejected=dict(zip(names, rejected)),
+        busy_time=dict(zip(names, busy_time)),
+        start=start,
+        end=start if end is None else max(end, start),
+        timeline={name: (times[index], occupied[index]) for index, name in enumerate(names)} if timeline else None,
+    )
+
+
+_sweep_trace = None  # The trace of the current sweep, set once in each worker process
+
+
+def _set_sweep_trace(trace: tuple) -> None:
+    """
+    Process pool initializer: keeps the trace of the sweep in the worker.
+    """
+    global _sweep_trace
+    _sweep_trace = trace
+
+
+def _simulate_sweep_point(capacities: dict) -> SimulationResult:
+    """
+    Process pool task: simulates the trace of the sweep with one set of slot counts.
+    """
+    arrival_times, fuel_types, durations, timeline = _sweep_trace
+    return simulate(capacities, arrival_times, fuel_types, durations, timeline)
+
+
+def sweep(
+    capacity_options: list, arrival_times, fuel_types, durations, processes: Optional[int] = None, timeline: bool = False
+) -> list:
+    """
+    Simulates the same trace with several slot counts, in parallel on a process pool.
+    Arguments:
+        capacity_options -- a list of capacities dictionaries (fuel type -> number of slots), one per simulation
+        arrival_times, fuel_types, durations -- the trace (see simulate)
+        processes -- the number of worker processes (default: the number of CPUs; 1 runs in this process)
+        timeline -- whether to record the number of occupied slots over time in each result
+    Returns:
+        list -- a SimulationResult per entry of capacity_options, in the same order.
+    """
+    trace = (list(arrival_times), list(fuel_types), list(durations), timeline)
+    processes = min(processes or multiprocessing.cpu_count(), len(capacity_options))
+    if processes <= 1:
+        return [simulate(capacities, *trace) for capacities in capacity_options]
+    with multiprocessing.Pool(processes, initializer=_set_sweep_trace, initargs=(trace,)) as pool:
+        return pool.map(_simulate_sweep_point, capacity_options, chunksize=1)
+
+
+if __name__ == "__main__":
+    # Example of how to use the FuelStation class
+
+    # Initialize a fuel station with 2 diesel (slots 1-2), 2 petrol (slots 3-4), and 1 electric slot (slot 5)
+    fuel_station = FuelStation(diesel=2, petrol=2, electric=1)
+
+    # Initial parking state (all slots are empty)
+    print(fuel_station.parking)
+
+    # Try fueling different types of vehicles and print the state after each operation
+
+    # Fuel a diesel vehicle (success)
+    print(fuel_station.fuel_vehicle("diesel"))  # Expected: 1 (slot ID)
+    print(fuel_station.parking)
+
+    # Fuel a petrol vehicle (success)
+    print(fuel_station.fuel_vehicle("petrol"))  # Expected: 3
+    print(fuel_station.parking)
+
+    # Fuel another diesel vehicle (success)
+    print(fuel_station.fuel_vehicle("diesel"))  # Expected: 2
+    print(fuel_station.parking)
+
+    # Fuel an electric vehicle (success)
+    print(fuel_station.fuel_vehicle("electric"))  # Expected: 5
+    print(fuel_station.parking)
 
-# Initial parking state (all slots are empty)
-print(fuel_station.parking)
+    # Try to fuel another diesel vehicle (fails, no more slots)
+    print(fuel_station.fuel_vehicle("diesel"))  # Expected: False
+    print(fuel_station.parking)
 
-# Try fueling different types of vehicles and print the state after each operation
+    # Open a diesel fuel slot (success)
+    print(fuel_station.open_fuel_slot("diesel"))  # Expected: True
+    print(fuel_station.parking)
 
-# Fuel a diesel vehicle (success)
-print(fuel_station.fuel_vehicle("diesel"))  # Expected: True
-print(fuel_station.parking)
+    # Fuel a diesel vehicle after opening a slot (success)
+    print(fuel_station.fuel_vehicle("diesel"))  # Expected: 2
+    print(fuel_station.parking)
 
-# Fuel a petrol vehicle (success)
-print(fuel_station.fuel_vehicle("petrol"))  # Expected: True
-print(fuel_station.parking)
+    # Open an electric fuel slot (success)
+    print(fuel_station.open_fuel_slot("electric"))  # Expected: True
+    print(fuel_station.parking)
 
-# Fuel another diesel vehicle (success)
-print(fuel_station.fuel_vehicle("diesel"))  # Expected: True
-print(fuel_station.parking)
+    # Try to open another electric fuel slot (fails, only 1 slot available)
+    print(fuel_station.open_fuel_slot("electric"))  # Expected: False
+    print(fuel_station.parking)
 
-# Fuel an electric vehicle (success)
-print(fuel_station.fuel_vehicle("electric"))  # Expected: True
-print(fuel_station.parking)
+    # Fuel vehicles by ID, look them up, and release them by vehicle or by slot
+    print(fuel_station.fuel_vehicle("petrol", vehicle_id="KA-01-1234"))  # Expected: 4
+    print(fuel_station.slot_of("KA-01-1234"))  # Expected: 4
+    print(fuel_station.fuel_vehicle("electric", vehicle_id="KA-02-5678"))  # Expected: 5
+    print(fuel_station.vehicle_at(5))  # Expected: KA-02-5678
+    print(fuel_station.release_vehicle("KA-01-1234"))  # Expected: True
+    print(fuel_station.release_slot(5))  # Expected: True
+    print(fuel_station.release_slot(5))  # Expected: False (already free)
+    print(fuel_station.parking)
 
-# Try to fuel another diesel vehicle (fails, no more slots)
-print(fuel_station.fuel_vehicle("diesel"))  # Expected: False
-print(fuel_station.parking)
+    # Route vehicles across several stations in two zones through a FuelNetwork
+    network = FuelNetwork()
+    north = network.add_station(FuelStation(electric=1), zone="north")  # Station 0
+    south = network.add_station(FuelStation(electric=2), zone="south")  # Station 1
+    network.add_station(FuelStation(electric=3), zone="south")  # Station 2
+    print(network.free_slots("electric"))  # Expected: 6
+    print(network.reserve("electric", zone="south"))  # Expected: (2, 1) (the least-loaded station in the south)
+    print(network.reserve("electric", zone="north", policy=FuelNetwork.FIRST_AVAILABLE))  # Expected: (0, 1)
+    print(network.reserve("electric", zone="north"))  # Expected: None (the north is full)
+    print(network.reserve_many("electric", 3, zone="south"))  # Expected: [(1, 1), (2, 2), (1, 2)]
+    print(network.free_slots("electric", zone="south"))  # Expected: 1
+    print(network.release(north, 1))  # Expected: True
+    print(network.free_slots("electric"))  # Expected: 2
 
-# Open a diesel fuel slot (success)
-print(fuel_station.open_fuel_slot("diesel"))  # Expected: True
-print(fuel_station.parking)
+    # Simulate a trace of arrivals (time, fuel type, service duration) through a station with 1 diesel and 1 electric slot
+    result = simulate({"diesel": 1, "electric": 1}, [0, 1, 2, 2, 3], ["diesel", "diesel", "diesel", "electric", "electric"], [2, 1, 5, 1, 1])
+    print(result.accepted)  # Expected: [True, False, True, True, True] (the first diesel leaves at 2, just in time)
+    print(result.rejection_rate)  # Expected: {'diesel': 0.3333333333333333, 'electric': 0.0}
+    print(result.utilization)  # Expected: {'diesel': 1.0, 'electric': 0.2857142857142857}
 
-# Fuel a diesel vehicle after opening a slot (success)
-print(fuel_station.fuel_vehicle("diesel"))  # Expected: True
-print(fuel_station.parking)
+    # Wait for a slot at a full station: the released slot is handed straight to the waiting vehicle
+    station = ConcurrentFuelStation(electric=1)
+    print(station.fuel_vehicle("electric", vehicle_id="EV-1"))  # Expected: 1
 
-# Open an electric fuel slot (success)
-print(fuel_station.open_fuel_slot("electric"))  # Expected: True
-print(fuel_station.parking)
+    async def wait_and_release():
+        waiting = asyncio.ensure_future(station.async_wait_for_slot("electric", vehicle_id="EV-2"))
+        await asyncio.sleep(0)  # Let the waiter queue up
+        print(station.fuel_vehicle("electric"))  # Expected: False (the slot is taken, and EV-2 is first in line)
+        print(station.release_vehicle("EV-1"))  # Expected: True
+        print(await waiting)  # Expected: 1 (handed over to EV-2)
 
-# Try to open another electric fuel slot (fails, only 1 slot available)
-print(fuel_station.open_fuel_slot("electric"))  # Expected: False
-print(fuel_station.parking)
+    asyncio.run(wait_and_release())
+    print(station.slot_of("EV-2"))  # Expected: 1
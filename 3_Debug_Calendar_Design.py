@@ -34,10 +34,10 @@ The Node Class:
   - If neither condition is met, it means the event overlaps with the current event, so we return False (indicating a double booking).
 
 The Calendar Class:
-- Purpose: The Calendar class uses a binary search tree (BST) to track events and prevent double bookings.
+- Purpose: The Calendar class tracks events and prevents double bookings. It used a binary search tree (BST) of Node objects, and now uses a sorted booking index (see "The Booking Index" below) that gives the same answers.
 - book Method:
-  - If the calendar is empty (i.e., the root is None), the first event is added as the root.
-  - If the calendar already has events, it attempts to insert the new event using the insert method of the root node.
+  - Originally, if the calendar was empty (i.e., the root was None), the first event was added as the root; otherwise the new event was inserted using the insert method of the root node.
+  - Now it looks up the first booked event that ends after the new event starts; the new event is booked unless that event starts before the new event ends.
 
 Issues in the Original Code:
 1. Incorrect Condition in insert Method: The original code had incorrect comments and conditions, such as:
@@ -48,20 +48,65 @@ Issues in the Original Code:
 Complexity:
 - Time Complexity:
   - The insert method works with a binary search tree. In the worst case (if the tree is unbalanced), the time complexity is O(n), where n is the number of events already booked. If the tree is balanced, it operates in O(log n).
-  
+  - Bookings usually arrive in time order, which turns the tree into a linked list: every booking walks all earlier events. For this reason Calendar no longer books through the tree (see "The Booking Index" below), and insert walks the tree in a loop rather than recursively, so a deep tree cannot exceed Python's recursion limit.
+
 - Space Complexity:
-  - The space complexity is O(n) because each event is stored in a node of the tree.
+  - The space complexity is O(n): the tree stored each event in a Node object, and the booking index stores each event as two 64-bit integers in arrays.
+
+The Booking Index:
+- Booked events never overlap, so sorting them by start time also sorts them by end time. Calendar keeps the start and end times in this order in parallel arrays of 64-bit integers (16 bytes per event, instead of a Node object per event).
+- The arrays are split into blocks of at most 2 * BLOCK_SIZE events, with the last end time of every block kept in a separate list.
+- book(start, end) finds the first event ending after `start` with two binary searches (one over the block list, one inside the block). The new event fits if there is no such event or that event starts at or after `end`; it is then inserted right before it, which moves at most one block of entries. A block that grows too large is split in two.
+- This keeps book at O(log n) searching plus the move of one bounded block, whatever order the events arrive in, with no recursion.
+- Because of the 64-bit arrays, times must be integers in the signed 64-bit range. The tree accepted any comparable times (e.g. floats); book now raises TypeError for a time that is not an integer and ValueError for one out of range, before anything is stored.
+
+Bulk Booking and Queries:
+- book_many(intervals) books a batch with the same result as calling book on each event in order. The batch is sorted, a single pointer walks the booked events alongside it to drop the events that overlap a booking, and the booking index is rebuilt once from the merged events. If events within the batch overlap each other, they are settled in batch order, as sequential booking would. Batches under 1/BULK_FRACTION of the booked events are simply booked one by one, which is cheaper than rebuilding the index.
+- events_between(a, b) returns the booked events overlapping [a, b), and first_free_slot(duration, after) returns the earliest start at or after `after` with `duration` free time. Both start with the same binary searches as book and then walk forward through the booked events, so they take O(log n + k) for k events visited.
+- is_free(start, end) checks an event without booking it.
+
+Many Resources (ResourceCalendar):
+- ResourceCalendar keeps one Calendar per resource (e.g. per meeting room) and, for every time bucket, two bitmaps with one bit per resource: resources with an event touching the bucket, and resources booked for the whole bucket.
+- To find resources free for [start, end), the bitmaps of the buckets it touches are combined with a few big-integer operations: untouched resources are free and wholly booked ones are busy, and only the partly booked ones are checked against their calendars. find_free and book_any stop at the first free resource, so they rarely check more than a handful of calendars, however many resources there are.
+- A single lock makes book_any an atomic find-and-book, so concurrent requests never book the same room twice.
+
+Persistence (PersistentCalendar):
+- PersistentCalendar stores the booked events in a data file as a sorted array of (start, end) int64 pairs. The file is memory-mapped and viewed as arrays of starts and ends, so book and is_free binary-search it in place: opening a calendar of any size takes well under a millisecond and creates no object per event.
+- New bookings are appended to a write-ahead log before they are acknowledged and kept in an in-memory Calendar, so every booking survives a restart.
+- compact() writes the data file and the logged events into a new file (copying the compacted events in slices between the logged ones), replaces the data file with os.replace, syncs the directory so the replacement survives a crash, and starts a new log. A generation number in both files tells whether a log was already compacted.
+- Both files are little-endian whatever machine wrote them, so they can be moved between machines. On a big-endian machine the data file is read into a byte-swapped copy instead of being searched in place.
 
 How the Debugging Was Done:
 - Identified that the conditions for checking event overlap in the insert method were incorrect.
 - Fixed the overlap check conditions to prevent double booking and ensure the correct event insertion behavior.
 - Verified the functionality using example test cases.
 
-This updated solution should now handle the calendar booking correctly, preventing double bookings and allowing for efficient event insertion using a binary search tree.
+This updated solution should now handle the calendar booking correctly, preventing double bookings and allowing for efficient event insertion using a blocked sorted index.
 
 """
 
-from typing import Optional
+import heapq
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+from array import array
+from bisect import bisect_right
+from itertools import accumulate, chain, compress, count, islice
+from operator import gt, index, itemgetter, lt
+from typing import Hashable, Iterable, Iterator, Optional
+
+BLOCK_SIZE = 1024  # Target number of events per block of the booking index (blocks are split at twice this size)
+_TIME_MIN = -(1 << 63)  # Event times are stored as signed 64-bit integers
+_TIME_MAX = (1 << 63) - 1
+_PERSISTENT_HEADER = struct.Struct("<4s4xQQ")  # Magic, generation (number of compactions), number of events
+_PERSISTENT_MAGIC = b"PCA1"
+_WAL_HEADER = struct.Struct("<Q")  # Generation of the data file the log belongs to
+_WAL_RECORD = struct.Struct("<qq")  # Start, end (little-endian, like the data file)
+BULK_FRACTION = 16  # book_many merges a batch of at least 1/BULK_FRACTION of the booked events; smaller batches are booked one by one
+
 
 class Node():
     """
@@ -72,6 +117,8 @@ class Node():
     - right_child: the right child node in the BST, representing events that start after this event ends.
     """
 
+    __slots__ = ("start", "end", "left_child", "right_child")
+
     def __init__(self, start: int, end: int):
         """
         Initialize a new Node (event) with start and end times.
@@ -88,69 +135,676 @@ class Node():
         """
         Attempts to insert a new event node into the calendar's binary tree while checking for conflicts.
         The method returns True if the event was successfully inserted (no conflicts), False if there's a conflict.
+        The tree is walked in a loop rather than recursively, so a deep (unbalanced) tree cannot hit the recursion limit.
         Arguments:
           node -- the new event node that needs to be inserted
         """
-        # if node.start <= self.end: # Incorrect Line
-        # If the new event's start time is after the current node's end time, it can go to the right child (events that start later)
-        if node.start >= self.end:
-            if not self.right_child:
-                self.right_child = node
-                return True
-            # return self.left_child.insert(node) # Incorrect Line
-            # Recursively try to insert in the right child subtree
-            return self.right_child.insert(node)
-        
-        # elif node.end >= self.start:  # Incorrect Line
-        # If the new event's end time is before the current node's start time, it can go to the left child (events that end earlier)
-        elif node.end <= self.start:
-            if not self.left_child:
-                self.left_child = node
-                return True
-            # Recursively try to insert in the left child subtree
-            return self.left_child.insert(node)
-        
-        # Added return False
-        # If neither condition is met, it means the events overlap and cannot be scheduled
-        return False
+        current = self
+        while True:
+            # if node.start <= current.end: # Incorrect Line
+            # If the new event's start time is after the current node's end time, it can go to the right child (events that start later)
+            if node.start >= current.end:
+                if not current.right_child:
+                    current.right_child = node
+                    return True
+                # return current.left_child.insert(node) # Incorrect Line
+                # Continue in the right child subtree
+                current = current.right_child
+
+            # elif node.end >= current.start:  # Incorrect Line
+            # If the new event's end time is before the current node's start time, it can go to the left child (events that end earlier)
+            elif node.end <= current.start:
+                if not current.left_child:
+                    current.left_child = node
+                    return True
+                # Continue in the left child subtree
+                current = current.left_child
+
+            else:
+                # Added return False
+                # If neither condition is met, it means the events overlap and cannot be scheduled
+                return False
+
+
+def _check_event(start: int, end: int) -> tuple:
+    """
+    Checks the times of an event before it is stored in int64 arrays, which would reject a float or an out-of-range
+    time only halfway through an update.
+    Returns:
+      tuple -- (start, end) as ints (e.g. converted from numpy integers)
+    """
+    start = index(start)  # TypeError for a float, like the arrays
+    end = index(end)
+    if end < start:
+        raise ValueError("an event cannot end before it starts")
+    if start < _TIME_MIN or end > _TIME_MAX:
+        raise ValueError("event times must fit in a signed 64-bit integer")
+    return start, end
 
 
 class Calendar():
     """
     The Calendar class allows adding events (start, end) and ensuring there are no double bookings.
-    It uses a binary search tree (BST) to store events in a way that makes it efficient to check for overlapping events.
+    Events are kept sorted in blocks of parallel start/end arrays (see "The Booking Index" above), so checking a new event
+    for overlaps takes two binary searches, whatever order the events are booked in.
     """
 
     def __init__(self):
         """
-        Initializes an empty calendar (BST with no events).
+        Initializes an empty calendar.
         """
-        self.root: Optional[Node] = None  # Root node of the binary search tree
-    
+        self.starts: list = []  # Blocks of event start times (array('q')), in order
+        self.ends: list = []  # Blocks of event end times (array('q')), parallel to `starts`
+        self.block_ends: list = []  # The last end time of each block
+        self.count: int = 0  # Number of booked events
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self) -> Iterator[tuple]:
+        """
+        Yields the booked events as (start, end) pairs, in time order.
+        """
+        for starts, ends in zip(self.starts, self.ends):
+            yield from zip(starts, ends)
+
     def book(self, start: int, end: int) -> bool:
         """
         Attempts to book an event in the calendar.
+        Times are stored as signed 64-bit integers: a time that is not an integer (e.g. a float) raises TypeError, and
+        one outside that range, or an event ending before it starts, raises ValueError.
         Arguments:
-          start -- the start time of the event
-          end -- the end time of the event
+          start -- the start time of the event, an integer
+          end -- the end time of the event (not before `start`)
+        Returns:
+          bool -- True if the event was successfully booked (no conflicts), False if it caused a double booking
+        """
+        start, end = _check_event(start, end)
+        block, position = self._find(start)
+        if block < len(self.starts) and position < len(self.starts[block]) and self.starts[block][position] < end:
+            return False  # The first event ending after `start` begins before `end`: a double booking
+        self._insert(block, position, start, end)
+        return True
+
+    def is_free(self, start: int, end: int) -> bool:
+        """
+        Checks whether an event from `start` to `end` could be booked, without booking it.
+        """
+        block, position = self._find(start)
+        return not (block < len(self.starts) and position < len(self.starts[block]) and self.starts[block][position] < end)
+
+    def book_many(self, intervals: Iterable[tuple]) -> list:
+        """
+        Books a batch of events, with the same result as calling book on each of them in order.
+        A large batch is sorted and checked against the booked events in one merge pass, and the booking index is rebuilt
+        once; a small batch (under 1/BULK_FRACTION of the booked events) is booked one event at a time.
+        The times are checked as in book, and an invalid time rejects the whole batch before anything is booked.
+        Arguments:
+          intervals -- (start, end) pairs
+        Returns:
+          list -- True for each event that was booked, False for each one that caused a double booking
+        """
+        intervals = list(intervals)
+        if len(intervals) * BULK_FRACTION < self.count:
+            return [self.book(start, end) for start, end in intervals]
+        try:
+            # Converting through int64 arrays checks the types and range of every time as book does, at C speed
+            starts = array("q", map(itemgetter(0), intervals)).tolist()
+            ends = array("q", map(itemgetter(1), intervals)).tolist()
+        except OverflowError:
+            raise ValueError("event times must fit in a signed 64-bit integer") from None
+        if any(map(gt, starts, ends)):
+            raise ValueError("an event cannot end before it starts")
+        order = sorted(range(len(intervals)), key=ends.__getitem__)
+        order.sort(key=starts.__getitem__)  # Stable, so the batch is now in (start, end) order
+
+        # Check the batch, in start order, against the booked events: a pointer walks the booked events once
+        booked_starts = list(chain.from_iterable(self.starts))
+        booked_ends = list(chain.from_iterable(self.ends))
+        if self.count:
+            candidates = []  # Batch indexes that do not overlap a booked event, in start order
+            booked = 0  # The first booked event that may end after the current start
+            for index in order:
+                start = starts[index]
+                while booked < self.count and booked_ends[booked] <= start:
+                    booked += 1
+                if booked == self.count or booked_starts[booked] >= ends[index]:
+                    candidates.append(index)
+        else:
+            candidates = order
+
+        # Events in start order overlap each other only if one starts before an earlier one ends
+        new_starts = list(map(starts.__getitem__, candidates))
+        new_ends = list(map(ends.__getitem__, candidates))
+        if any(map(lt, new_starts[1:], accumulate(new_ends, max))):
+            # Resolve the overlaps within the batch as sequential booking would: earlier events in the batch win
+            accepted = [False] * len(intervals)
+            batch = Calendar()
+            for index in sorted(candidates):
+                accepted[index] = batch.book(starts[index], ends[index])
+            candidates = [index for index in candidates if accepted[index]]
+            new_starts = list(map(starts.__getitem__, candidates))
+            new_ends = list(map(ends.__getitem__, candidates))
+        elif len(candidates) == len(intervals):
+            accepted = [True] * len(intervals)
+        else:
+            accepted = [False] * len(intervals)
+            for index in candidates:
+                accepted[index] = True
+
+        if self.count:
+            # Both the booked events and the new ones are sorted, so sorting their concatenation is a merge of two runs
+            booked_starts += new_starts
+            booked_ends += new_ends
+            order = sorted(range(len(booked_starts)), key=booked_ends.__getitem__)
+            order.sort(key=booked_starts.__getitem__)
+            new_starts = list(map(booked_starts.__getitem__, order))
+            new_ends = list(map(booked_ends.__getitem__, order))
+        self._load(array("q", new_starts), array("q", new_ends))
+        return accepted
+
+    def events_between(self, start: int, end: int) -> list:
+        """
+        Returns the booked events that overlap the time from `start` to `end`, in time order.
+        Takes O(log n + k) for k events returned.
+        """
+        events = []
+        for event in self._iter_from(*self._find(start)):
+            if event[0] >= end:
+                break  # This and every later event start at or after `end`
+            events.append(event)
+        return events
+
+    def first_free_slot(self, duration: int, after: int) -> int:
+        """
+        Finds the earliest time, at or after `after`, at which an event of the given duration could be booked.
+        Takes O(log n + k), where k is the number of booked events the slot has to be moved past.
+        Arguments:
+          duration -- the length of the event
+          after -- the earliest acceptable start time
+        Returns:
+          int -- the start time of the first free slot (the calendar has no end, so there always is one)
+        """
+        if duration < 0:
+            raise ValueError("an event cannot have a negative duration")
+        time = after
+        for start, end in self._iter_from(*self._find(after)):
+            if end <= time:
+                continue  # An empty event at `time` does not block anything
+            if start >= time + duration:
+                break  # The gap before this event is long enough
+            time = end
+        return time
+
+    def _find(self, time: int) -> tuple:
+        """
+        Finds the first event ending after `time`.
+        Returns:
+          tuple -- (block, position) of that event, or the position right after the last event if there is none.
+        """
+        block = bisect_right(self.block_ends, time)
+        if block == len(self.block_ends):
+            # Every event ends at or before `time`: point past the last event
+            return (block - 1, len(self.ends[-1])) if block else (0, 0)
+        return block, bisect_right(self.ends[block], time)
+
+    def _insert(self, block: int, position: int, start: int, end: int) -> None:
+        """
+        Inserts an event at a position returned by _find, splitting the block if it grows too large.
+        """
+        if not self.starts:
+            self.starts.append(array("q"))
+            self.ends.append(array("q"))
+            self.block_ends.append(end)
+        starts = self.starts[block]
+        ends = self.ends[block]
+        starts.insert(position, start)
+        ends.insert(position, end)
+        self.block_ends[block] = ends[-1]
+        self.count += 1
+        if len(starts) >= 2 * BLOCK_SIZE:
+            self.starts[block + 1:block + 1] = [starts[BLOCK_SIZE:]]
+            self.ends[block + 1:block + 1] = [ends[BLOCK_SIZE:]]
+            self.block_ends.insert(block, ends[BLOCK_SIZE - 1])
+            del starts[BLOCK_SIZE:]
+            del ends[BLOCK_SIZE:]
+
+    def _iter_from(self, block: int, position: int) -> Iterator[tuple]:
+        """
+        Yields the booked events as (start, end) pairs, in time order, from a position returned by _find.
+        """
+        for block in range(block, len(self.starts)):
+            yield from islice(zip(self.starts[block], self.ends[block]), position, None)
+            position = 0
+
+    def _load(self, starts: array, ends: array) -> None:
+        """
+        Replaces the booking index with sorted, non-overlapping events given as parallel start/end arrays.
+        """
+        self.starts = [starts[offset:offset + BLOCK_SIZE] for offset in range(0, len(starts), BLOCK_SIZE)]
+        self.ends = [ends[offset:offset + BLOCK_SIZE] for offset in range(0, len(ends), BLOCK_SIZE)]
+        self.block_ends = [block[-1] for block in self.ends]
+        self.count = len(starts)
+
+
+class ResourceCalendar():
+    """
+    The ResourceCalendar class books events on many resources (e.g. meeting rooms), each with its own Calendar, and finds
+    resources free for a given time without asking every calendar.
+    Time is split into buckets of `bucket_size`. For every bucket, two bitmaps (Python ints, one bit per resource) record
+    which resources have an event touching the bucket and which are booked for the whole bucket:
+    - a resource with no event touching any bucket of the requested time is certainly free,
+    - a resource booked for a whole bucket of the requested time is certainly not free,
+    - only the remaining resources are checked against their calendars.
+    All methods hold one lock, so bookings from several threads never double book a resource.
+    """
+
+    def __init__(self, resources: Iterable[Hashable], bucket_size: int = 15):
+        """
+        Initializes a calendar for each resource.
+        Arguments:
+          resources -- the resource names, in the order find_free prefers them (e.g. range(100) or ["Room A", "Room B"])
+          bucket_size -- the length of a time bucket; best at the step that event times fall on (e.g. 15 for
+                         quarter hours counted in minutes), so that most booked buckets are booked whole
+        """
+        if bucket_size <= 0:
+            raise ValueError("bucket_size must be positive")
+        self.bucket_size: int = bucket_size
+        self.resources: list = []  # Resource index -> name
+        self.index: dict = {}  # Resource name -> index (its bit in the bitmaps)
+        self.calendars: list = []  # Resource index -> Calendar
+        self.touched: dict = {}  # Bucket -> bitmap of resources with an event touching the bucket
+        self.full: dict = {}  # Bucket -> bitmap of resources booked for the whole bucket
+        self.lock = threading.Lock()
+        for resource in resources:
+            self.add_resource(resource)
+
+    def add_resource(self, resource: Hashable) -> None:
+        """
+        Adds a resource with an empty calendar.
+        """
+        with self.lock:
+            if resource in self.index:
+                raise ValueError(f"resource {resource!r} already exists")
+            self.index[resource] = len(self.resources)
+            self.resources.append(resource)
+            self.calendars.append(Calendar())
+
+    def calendar(self, resource: Hashable) -> "CalendarView":
+        """
+        Returns a read-only view of the calendar of a resource.
+        Bookings must go through the ResourceCalendar, which keeps the bucket bitmaps up to date.
+        """
+        return CalendarView(self.calendars[self.index[resource]])
+
+    def book(self, resource: Hashable, start: int, end: int) -> bool:
+        """
+        Attempts to book an event on a given resource.
+        Returns:
+          bool -- True if the event was booked, False if it caused a double booking on that resource
+        """
+        with self.lock:
+            return self._book(self.index[resource], start, end)
+
+    def find_free(self, start: int, end: int) -> Optional[Hashable]:
+        """
+        Returns the first resource (in resource order) free from `start` to `end`, or None if every resource is busy.
+        """
+        with self.lock:
+            resource = next(self._free_resources(start, end), None)
+            return None if resource is None else self.resources[resource]
+
+    def find_all_free(self, start: int, end: int) -> list:
+        """
+        Returns every resource free from `start` to `end`, in resource order.
+        """
+        with self.lock:
+            free, check = self._candidates(start, end)
+            calendars = self.calendars
+            for resource in _bits(check):
+                if calendars[resource].is_free(start, end):
+                    free |= 1 << resource
+            return list(map(self.resources.__getitem__, _bits(free)))
+
+    def book_any(self, start: int, end: int) -> Optional[Hashable]:
+        """
+        Books an event on the first resource free from `start` to `end`, as one atomic step.
+        Returns:
+          The name of the booked resource, or None if every resource is busy.
+        """
+        with self.lock:
+            for resource in self._free_resources(start, end):
+                if self._book(resource, start, end):
+                    return self.resources[resource]
+            return None
+
+    def _free_resources(self, start: int, end: int) -> Iterator[int]:
+        """
+        Yields the indexes of the resources free from `start` to `end`, in resource order, lazily.
+        Resources with no event nearby are yielded right away; only the uncertain ones are checked against their calendars.
+        """
+        free, check = self._candidates(start, end)
+        calendars = self.calendars
+        while free:
+            first = (free & -free).bit_length() - 1  # The next certainly free resource
+            for resource in _bits(check & ((1 << first) - 1)):
+                if calendars[resource].is_free(start, end):
+                    yield resource
+            yield first
+            free ^= 1 << first
+            check = check >> (first + 1) << (first + 1)  # Drop the uncertain resources up to `first`, already checked
+        for resource in _bits(check):
+            if calendars[resource].is_free(start, end):
+                yield resource
+
+    def _candidates(self, start: int, end: int) -> tuple:
+        """
+        Splits the resources by the bucket bitmaps of the time from `start` to `end`.
+        Returns:
+          tuple -- (bitmap of resources certainly free, bitmap of resources to check against their calendars)
+        """
+        if end < start:
+            raise ValueError("an event cannot end before it starts")
+        touched = 0
+        full = 0
+        for bucket in self._buckets(start, end):
+            touched |= self.touched.get(bucket, 0)
+            full |= self.full.get(bucket, 0)
+        if start == end:
+            full = 0  # An empty event fits between two back to back events, even in a fully booked bucket
+        return ((1 << len(self.resources)) - 1) & ~touched, touched & ~full
+
+    def _book(self, resource: int, start: int, end: int) -> bool:
+        """
+        Books an event on a resource by index and updates the bucket bitmaps.
+        """
+        calendar = self.calendars[resource]
+        if not calendar.book(start, end):
+            return False
+        bit = 1 << resource
+        size = self.bucket_size
+        for bucket in self._buckets(start, end):
+            self.touched[bucket] = self.touched.get(bucket, 0) | bit
+            bucket_start = bucket * size
+            # The event covers the inner buckets; a partly covered bucket may have been filled up by earlier events
+            bucket_end = bucket_start + size
+            if start <= bucket_start and end >= bucket_end or calendar.first_free_slot(1, bucket_start) >= bucket_end:
+                self.full[bucket] = self.full.get(bucket, 0) | bit
+        return True
+
+    def _buckets(self, start: int, end: int) -> range:
+        """
+        Returns the buckets that the time from `start` to `end` touches.
+        """
+        return range(start // self.bucket_size, max(start, end - 1) // self.bucket_size + 1)
+
+
+class CalendarView():
+    """
+    A read-only view of a Calendar: it answers queries but cannot book.
+    """
+
+    def __init__(self, calendar: Calendar):
+        self._calendar = calendar
+
+    def __len__(self) -> int:
+        return len(self._calendar)
+
+    def __iter__(self) -> Iterator[tuple]:
+        return iter(self._calendar)
+
+    def is_free(self, start: int, end: int) -> bool:
+        return self._calendar.is_free(start, end)
+
+    def events_between(self, start: int, end: int) -> list:
+        return self._calendar.events_between(start, end)
+
+    def first_free_slot(self, duration: int, after: int) -> int:
+        return self._calendar.first_free_slot(duration, after)
+
+
+def _bits(bitmap: int) -> Iterator[int]:
+    """
+    Yields the positions of the set bits of a bitmap, lowest first.
+    Reading the binary digits of the bitmap (lowest first) keeps the work per bit in C.
+    """
+    return compress(count(), map("1".__eq__, bin(bitmap)[:1:-1]))
+
+
+class PersistentCalendar():
+    """
+    The PersistentCalendar class is a Calendar kept on disk, which can be opened and queried right away after a restart.
+    - The data file holds the compacted events as a sorted array of (start, end) int64 pairs after a small header. It is
+      memory-mapped and searched in place, so opening it reads nothing and creates no object per event.
+    - New events are appended to a write-ahead log (the data file path + ".wal") and kept in an in-memory Calendar.
+    - compact() merges the logged events into a new data file, which replaces the old one atomically, and starts a new log.
+      It runs automatically once `compact_after` events are logged.
+    - Both files carry a generation number, so a log whose events were already compacted (the process stopped between
+      replacing the data file and starting the new log) is recognized and ignored.
+    - Both files are little-endian, so they can be read on any machine.
+    """
+
+    def __init__(self, path: str, compact_after: int = 65536, sync: bool = False):
+        """
+        Opens (or creates) a persistent calendar.
+        Arguments:
+          path -- the data file; the write-ahead log is kept next to it
+          compact_after -- how many logged events trigger a compaction
+          sync -- whether to fsync the log after every booking (survives power loss, not just process crashes)
+        """
+        self.path: str = path
+        self.wal_path: str = path + ".wal"
+        self.compact_after: int = compact_after
+        self.sync: bool = sync
+        if not os.path.exists(path):
+            with open(path, "wb") as file:
+                file.write(_PERSISTENT_HEADER.pack(_PERSISTENT_MAGIC, 0, 0))
+        self._map()
+        self.recent = Calendar()  # Events logged since the last compaction
+        log = b""
+        if os.path.exists(self.wal_path):
+            with open(self.wal_path, "rb") as file:
+                log = file.read()
+        if len(log) >= _WAL_HEADER.size and _WAL_HEADER.unpack_from(log)[0] == self.generation:
+            # Replay the log, dropping a torn record at its end
+            records = log[_WAL_HEADER.size:]
+            for start, end in _WAL_RECORD.iter_unpack(records[:len(records) - len(records) % _WAL_RECORD.size]):
+                self.recent.book(start, end)
+            self.wal = open(self.wal_path, "ab")
+        else:
+            self._new_log()
+
+    def __enter__(self) -> "PersistentCalendar":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.base_count + len(self.recent)
+
+    def __iter__(self) -> Iterator[tuple]:
+        """
+        Yields the booked events as (start, end) pairs, in time order.
+        """
+        return heapq.merge(zip(self.base_starts, self.base_ends), self.recent)
+
+    def book(self, start: int, end: int) -> bool:
+        """
+        Attempts to book an event, logging it before it is acknowledged.
+        Times are stored as signed 64-bit integers: a time that is not an integer (e.g. a float) raises TypeError, and
+        one outside that range, or an event ending before it starts, raises ValueError.
+        Arguments:
+          start -- the start time of the event, an integer
+          end -- the end time of the event (not before `start`)
         Returns:
           bool -- True if the event was successfully booked (no conflicts), False if it caused a double booking
         """
-        if self.root is None:
-            # If the calendar is empty, create a new root node
-            self.root = Node(start=start, end=end)
-            return True
-        
-        # If the calendar is not empty, try to insert the new event into the BST
-        return self.root.insert(node=Node(start, end))
+        start, end = _check_event(start, end)
+        if not (self._base_free(start, end) and self.recent.is_free(start, end)):
+            return False
+        self.wal.write(_WAL_RECORD.pack(start, end))
+        self.wal.flush()
+        if self.sync:
+            os.fsync(self.wal.fileno())
+        self.recent.book(start, end)
+        if len(self.recent) >= self.compact_after:
+            self.compact()
+        return True
+
+    def is_free(self, start: int, end: int) -> bool:
+        """
+        Checks whether an event from `start` to `end` could be booked, without booking it.
+        """
+        return self._base_free(start, end) and self.recent.is_free(start, end)
+
+    def events_between(self, start: int, end: int) -> list:
+        """
+        Returns the booked events that overlap the time from `start` to `end`, in time order.
+        """
+        events = []
+        position = bisect_right(self.base_ends, start)
+        while position < self.base_count and self.base_starts[position] < end:
+            events.append((self.base_starts[position], self.base_ends[position]))
+            position += 1
+        return sorted(events + self.recent.events_between(start, end))
+
+    def compact(self) -> None:
+        """
+        Writes the data file and the logged events into a new data file, replaces the data file with it and empties the log.
+        The compacted events are copied in slices between the logged ones, never one by one.
+        """
+        temporary = self.path + ".tmp"
+        with open(temporary, "wb") as file:
+            file.write(_PERSISTENT_HEADER.pack(_PERSISTENT_MAGIC, self.generation + 1, len(self)))
+            data = self.base_data
+            copied = 0
+            for start, end in self.recent:
+                # Logged events never overlap compacted ones, so each goes right before the first one ending after it
+                position = bisect_right(self.base_ends, start)
+                file.write(_little_endian(data[2 * copied:2 * position]))
+                file.write(_WAL_RECORD.pack(start, end))
+                copied = position
+            file.write(_little_endian(data[2 * copied:]))
+            file.flush()
+            os.fsync(file.fileno())
+        self._unmap()
+        os.replace(temporary, self.path)
+        _sync_directory(os.path.dirname(os.path.abspath(self.path)))  # Make the replacement itself durable
+        self._map()
+        self.wal.close()
+        self._new_log()
+        self.recent = Calendar()
+
+    def close(self) -> None:
+        """
+        Closes the log and the data file. Logged events stay in the log until the next compaction.
+        """
+        self.wal.close()
+        self._unmap()
+
+    def _new_log(self) -> None:
+        """
+        Starts an empty log for the current generation of the data file.
+        """
+        self.wal = open(self.wal_path, "wb")
+        self.wal.write(_WAL_HEADER.pack(self.generation))
+        self.wal.flush()
+
+    def _base_free(self, start: int, end: int) -> bool:
+        """
+        Checks an event against the compacted events: binary search for the first one ending after `start`.
+        """
+        position = bisect_right(self.base_ends, start)
+        return position == self.base_count or self.base_starts[position] >= end
+
+    def _map(self) -> None:
+        """
+        Memory-maps the data file and exposes its events as int64 views (starts and ends), without copying them.
+        The file is little-endian; on a big-endian machine the views are of a byte-swapped copy instead.
+        """
+        with open(self.path, "rb") as file:
+            self.mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.generation, self.base_count = _PERSISTENT_HEADER.unpack_from(self.mapping)
+        if magic != _PERSISTENT_MAGIC:
+            self.mapping.close()
+            raise ValueError(f"{self.path} is not a persistent calendar file")
+        self.base_data = memoryview(self.mapping)[_PERSISTENT_HEADER.size:].cast("q")
+        if sys.byteorder == "big":
+            swapped = array("q", self.base_data)
+            swapped.byteswap()
+            self.base_data.release()
+            self.base_data = memoryview(swapped)
+        self.base_starts = self.base_data[0::2]
+        self.base_ends = self.base_data[1::2]
+
+    def _unmap(self) -> None:
+        """
+        Releases the views of the data file and closes its mapping.
+        """
+        if self.mapping.closed:
+            return
+        for view in (self.base_starts, self.base_ends, self.base_data):
+            view.release()
+        self.mapping.close()
+
+
+def _little_endian(events: memoryview):
+    """
+    Returns int64 values in the little-endian byte order of the data file: the values themselves on a little-endian
+    machine, a byte-swapped copy otherwise.
+    """
+    if sys.byteorder == "little":
+        return events
+    swapped = array("q", events)
+    swapped.byteswap()
+    return swapped
+
+
+def _sync_directory(path: str) -> None:
+    """
+    Flushes the entries of a directory (e.g. a file renamed into it) to disk. Does nothing where a directory cannot be
+    opened (e.g. on Windows).
+    """
+    try:
+        descriptor = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+if __name__ == "__main__":
+    # Example usage of the Calendar class
+    myCalendar = Calendar()
+
+    # Try booking an event from time 5 to 10
+    print(myCalendar.book(5, 10))  # Expected: True (Event booked successfully)
+    # Try booking an event from time 8 to 13 (this overlaps with the previous event)
+    print(myCalendar.book(8, 13))  # Expected: False (Double booking)
+    # Try booking another event from time 10 to 15 (this does not overlap with any existing events)
+    print(myCalendar.book(10, 15))  # Expected: True (Event booked successfully)
 
+    # Book several events at once, then look up what is booked and where there is room
+    print(myCalendar.book_many([(20, 25), (0, 5), (22, 30), (15, 20)]))  # Expected: [True, True, False, True]
+    print(myCalendar.events_between(9, 21))  # Expected: [(5, 10), (10, 15), (15, 20), (20, 25)]
+    print(myCalendar.first_free_slot(3, after=0))  # Expected: 25 (booked from 0 to 25)
 
-# Example usage of the Calendar class
-myCalendar = Calendar()
+    # Book any free room among three, then look up which rooms are still free
+    rooms = ResourceCalendar(["Room A", "Room B", "Room C"])
+    print(rooms.book("Room A", 840, 900))  # Expected: True
+    print(rooms.book_any(840, 900))  # Expected: Room B (Room A is taken)
+    print(rooms.find_all_free(870, 960))  # Expected: ['Room C']
+    print(rooms.find_free(900, 960))  # Expected: Room A (free again from 900)
 
-# Try booking an event from time 5 to 10
-print(myCalendar.book(5, 10))  # Expected: True (Event booked successfully)
-# Try booking an event from time 8 to 13 (this overlaps with the previous event)
-print(myCalendar.book(8, 13))  # Expected: False (Double booking)
-# Try booking another event from time 10 to 15 (this does not overlap with any existing events)
-print(myCalendar.book(10, 15))  # Expected: True (Event booked successfully)
+    # Book events in a persistent calendar, then reopen it: the bookings are replayed from the write-ahead log
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "calendar.dat")
+        with PersistentCalendar(path) as calendar:
+            print(calendar.book(5, 10))  # Expected: True
+            print(calendar.book(10, 15))  # Expected: True
+        with PersistentCalendar(path) as calendar:
+            print(calendar.book(8, 13))  # Expected: False (the events logged before the reopen are still booked)
+            print(list(calendar))  # Expected: [(5, 10), (10, 15)]
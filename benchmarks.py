@@ -0,0 +1,771 @@
+"""
+Benchmarks for the assignment solutions.
+
+The solution files start with a digit (e.g. 1_Data_Stream_Ingestion.py), so they cannot be imported with a plain
+`import` statement. `load_solution` imports them with importlib instead.
+
+Usage:
+    python benchmarks.py datastream-memory [--events N] [--keys-per-second K]
+    python benchmarks.py datastream-batch [--events N] [--chunk N] [--keys N]
+    python benchmarks.py datastream-sharded [--events N] [--chunk N] [--keys N]
+    python benchmarks.py datastream-compact [--events N] [--keys-per-second K] [--approximate-bytes N]
+    python benchmarks.py datastream-restart [--keys N] [--path FILE] [--prefix-windows]
+    python benchmarks.py fuel-wait [--clients N] [--slots N] [--visits N] [--hold SECONDS] [--poll-interval SECONDS]
+    python benchmarks.py fuel-network [--stations N] [--slots N] [--operations N]
+    python benchmarks.py fuel-simulate [--arrivals N] [--slots N] [--sweep N] [--processes N]
+    python benchmarks.py calendar-book [--events N ...] [--tree-limit N]
+    python benchmarks.py calendar-resources [--resources N] [--events N] [--bucket-size N] [--naive-events N]
+    python benchmarks.py calendar-restart [--events N] [--path FILE]
+    python benchmarks.py suite [--size N] [--workloads NAME ...] [--instrument] [--output FILE] [--compare FILE]
+"""
+
+import argparse
+import heapq
+import importlib
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from instrumentation import instrument
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_solution(file_name: str):
+    """
+    Loads one of the numbered solution files as a module.
+    The solution files start with a digit, so they cannot be named in an `import` statement, but importlib can import
+    them under their real name. That name is what process pools use to find the module's functions again in worker
+    processes, which works with every start method (fork, and spawn as on macOS and Windows).
+    Arguments:
+        file_name -- the solution file name, e.g. "1_Data_Stream_Ingestion.py"
+    Returns:
+        module -- the loaded module
+    """
+    if HERE not in sys.path:
+        sys.path.insert(0, HERE)
+    return importlib.import_module(os.path.splitext(file_name)[0])
+
+
+def rss_bytes() -> int:
+    """
+    Returns the current resident set size of this process.
+    Falls back to the peak RSS on platforms without /proc, and returns 0 where neither is available (Windows).
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        try:
+            import resource  # Unix only
+        except ImportError:
+            return 0
+        # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def bench_datastream_memory(args) -> None:
+    """
+    Feeds a long stream of mostly unique strings through DataStream and samples RSS along the way.
+    With eviction, RSS and the number of stored strings stay flat once the first window has filled.
+    """
+    DataStream = load_solution("1_Data_Stream_Ingestion.py").DataStream
+    stream = DataStream()
+    per_second = args.keys_per_second
+    samples = 10
+    step = args.events // samples
+
+    print(f"{'events':>12} {'timestamp':>10} {'stored':>10} {'rss (MiB)':>10}")
+    started = time.perf_counter()
+    for i in range(args.events):
+        stream.should_output_data_str(i // per_second, f"request-{i}")
+        if (i + 1) % step == 0:
+            print(f"{i + 1:>12} {i // per_second:>10} {len(stream.data):>10} {rss_bytes() / 2**20:>10.1f}")
+    elapsed = time.perf_counter() - started
+    print(f"{args.events / elapsed:,.0f} events/sec")
+
+
+def bench_datastream_batch(args) -> None:
+    """
+    Compares calling should_output_data_str once per message with should_output_batch on chunks of the same stream.
+    """
+    DataStream = load_solution("1_Data_Stream_Ingestion.py").DataStream
+    rng = random.Random(0)
+    timestamps = sorted(rng.randrange(args.events // 1000 + 1) for _ in range(args.events))
+    strings = [f"key-{rng.randrange(args.keys)}" for _ in range(args.events)]
+
+    stream = DataStream()
+    should_output = stream.should_output_data_str
+    started = time.perf_counter()
+    expected = [should_output(timestamp, data_string) for timestamp, data_string in zip(timestamps, strings)]
+    scalar = time.perf_counter() - started
+
+    stream = DataStream()
+    started = time.perf_counter()
+    got = []
+    for offset in range(0, args.events, args.chunk):
+        got.extend(stream.should_output_batch(timestamps[offset:offset + args.chunk], strings[offset:offset + args.chunk]))
+    batched = time.perf_counter() - started
+
+    assert [bool(printed) for printed in got] == expected
+    print(f"scalar: {args.events / scalar:>12,.0f} events/sec")
+    print(f"batch:  {args.events / batched:>12,.0f} events/sec ({scalar / batched:.1f}x)")
+
+
+def bench_datastream_sharded(args) -> None:
+    """
+    Throughput of ShardedDataStream (threads) and ProcessShardedDataStream (processes) at 1, 2, 4 and 8 workers.
+    Each thread feeds the messages of its own share of the shards, in chronological order; the process variant is fed
+    chunk by chunk.
+    """
+    solution = load_solution("1_Data_Stream_Ingestion.py")
+    # A message arriving behind its shard's latest timestamp (as with several producer threads) is still decided exactly
+    stream = solution.ShardedDataStream(shards=1)
+    late = [stream.should_output_data_str(5, "a"), stream.should_output_data_str(10, "b"), stream.should_output_data_str(9, "a")]
+    assert late == [True, True, False], late
+    rng = random.Random(0)
+    timestamps = sorted(rng.randrange(args.events // 1000 + 1) for _ in range(args.events))
+    strings = [f"key-{rng.randrange(args.keys)}" for _ in range(args.events)]
+
+    print(f"{'workers':>8} {'threads (events/sec)':>22} {'processes (events/sec)':>24}")
+    for workers in (1, 2, 4, 8):
+        stream = solution.ShardedDataStream(shards=64)
+
+        # The worker counts divide the shard count, so every shard is fed by one thread only
+        shares = [([], []) for _ in range(workers)]
+        for timestamp, data_string in zip(timestamps, strings):
+            share = shares[hash(data_string) % workers]
+            share[0].append(timestamp)
+            share[1].append(data_string)
+
+        def feed(share: tuple) -> None:
+            should_output = stream.should_output_data_str
+            for timestamp, data_string in zip(*share):
+                should_output(timestamp, data_string)
+
+        threads = [threading.Thread(target=feed, args=(share,)) for share in shares]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        threaded = time.perf_counter() - started
+
+        with solution.ProcessShardedDataStream(workers=workers) as stream:
+            started = time.perf_counter()
+            for offset in range(0, args.events, args.chunk):
+                stream.should_output_batch(timestamps[offset:offset + args.chunk], strings[offset:offset + args.chunk])
+            processes = time.perf_counter() - started
+        print(f"{workers:>8} {args.events / threaded:>22,.0f} {args.events / processes:>24,.0f}")
+
+
+def bench_datastream_compact(args) -> None:
+    """
+    Memory per live string and throughput of DataStream, CompactDataStream and ApproximateDataStream on the same stream of
+    mostly unique strings, plus the measured false suppression rate of ApproximateDataStream.
+    """
+    solution = load_solution("1_Data_Stream_Ingestion.py")
+    per_second = args.keys_per_second
+    rng = random.Random(0)
+    # Only the numbers are generated up front; each string is built during the run, so that the memory a store keeps
+    # strings alive with is attributed to it.
+    numbers = [rng.randrange(args.events) for _ in range(args.events)]
+    streams = {
+        "DataStream": lambda: solution.DataStream(),
+        "CompactDataStream": lambda: solution.CompactDataStream(),
+        "ApproximateDataStream": lambda: solution.ApproximateDataStream(memory_bytes=args.approximate_bytes),
+    }
+
+    expected = None
+    print(f"{'':>22} {'events/sec':>12} {'bytes/live string':>18} {'false suppressions':>19}")
+    for name, make in streams.items():
+        # Run twice: once for speed, once under tracemalloc for the memory held at the end of the run.
+        stream = make()
+        should_output = stream.should_output_data_str
+        started = time.perf_counter()
+        printed = [should_output(i // per_second, f"request-{number}") for i, number in enumerate(numbers)]
+        elapsed = time.perf_counter() - started
+
+        tracemalloc.start()
+        stream = make()
+        should_output = stream.should_output_data_str
+        for i, number in enumerate(numbers):
+            should_output(i // per_second, f"request-{number}")
+        held = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        if expected is None:
+            expected = printed
+            live = len(stream.data)
+        suppressed = sum(1 for want, got in zip(expected, printed) if want and not got) / sum(expected)
+        print(f"{name:>22} {args.events / elapsed:>12,.0f} {held / live:>18,.1f} {suppressed:>19.4%}")
+
+    estimate = solution.ApproximateDataStream.false_suppression_rate(live, args.approximate_bytes)
+    print(f"{live:,} live strings; estimated ApproximateDataStream false suppression rate: {estimate:.4%}")
+
+
+def bench_datastream_restart(args) -> None:
+    """
+    Time to snapshot and restore a DataStream holding N live strings, against rebuilding it by replaying one print per
+    string through should_output_data_str.
+    """
+    DataStream = load_solution("1_Data_Stream_Ingestion.py").DataStream
+    timestamps = [i * 5 // args.keys for i in range(args.keys)]  # All strings printed within one window.
+    strings = [f"user-agent-{i}" for i in range(args.keys)]
+
+    def new_stream():
+        stream = DataStream()
+        if args.prefix_windows:
+            # Per-prefix and per-string windows, so restore has to work out the window of every string
+            for digit in range(1, 10):
+                stream.set_window(f"user-agent-{digit}", 5 + digit, prefix=True)
+            stream.set_window("user-agent-12", 30, prefix=True)
+            stream.set_window("user-agent-0", 60)
+        return stream
+
+    stream = new_stream()
+    should_output = stream.should_output_data_str
+    started = time.perf_counter()
+    for timestamp, data_string in zip(timestamps, strings):
+        should_output(timestamp, data_string)
+    replay = time.perf_counter() - started
+
+    path = args.path or os.path.join(tempfile.gettempdir(), "datastream.snapshot")
+    try:
+        started = time.perf_counter()
+        stream.snapshot(path)
+        saved = time.perf_counter() - started
+        size = os.path.getsize(path)
+        del stream
+
+        restored = new_stream()
+        started = time.perf_counter()
+        restored.restore(path)
+        restore = time.perf_counter() - started
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+    assert len(restored.data) == args.keys
+    assert sum(map(len, restored.expiry.values())) == args.keys
+    print(f"{args.keys:,} live strings, snapshot of {size / 2**20:,.1f} MiB")
+    print(f"replay:   {replay:8.2f}s")
+    print(f"snapshot: {saved:8.2f}s")
+    print(f"restore:  {restore:8.2f}s ({replay / restore:.1f}x faster than replay)")
+
+
+def percentile(values: list, fraction: float) -> float:
+    """
+    Returns the value below which the given fraction of the values fall (nearest rank).
+    """
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def bench_fuel_wait(args) -> None:
+    """
+    CPU time and wait latency of clients contending for a few slots, waiting with ConcurrentFuelStation.wait_for_slot
+    against polling fuel_vehicle until it succeeds.
+    """
+    ConcurrentFuelStation = load_solution("2_Fuel_Station_Design.py").ConcurrentFuelStation
+
+    def run(acquire) -> tuple:
+        station = ConcurrentFuelStation(electric=args.slots)
+        waits = []
+
+        def client(number: int) -> None:
+            for visit in range(args.visits):
+                started = time.perf_counter()
+                slot = acquire(station, (number, visit))
+                waits.append(time.perf_counter() - started)
+                time.sleep(args.hold)
+                station.release_slot(slot)
+
+        threads = [threading.Thread(target=client, args=(number,)) for number in range(args.clients)]
+        cpu = time.process_time()
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.process_time() - cpu, time.perf_counter() - started, waits
+
+    def poll(station, vehicle_id):
+        while True:
+            slot = station.fuel_vehicle("electric", vehicle_id)
+            if slot:
+                return slot
+            time.sleep(args.poll_interval)
+
+    def wait(station, vehicle_id):
+        return station.wait_for_slot("electric", vehicle_id)
+
+    print(f"{args.clients} clients, {args.slots} slots, {args.visits} visits each, holding a slot for {args.hold * 1000:g} ms")
+    print(f"{'':>8} {'cpu (s)':>9} {'wall (s)':>9} {'p50 wait (ms)':>14} {'p99 wait (ms)':>14}")
+    for name, acquire in (("polling", poll), ("waiting", wait)):
+        cpu, wall, waits = run(acquire)
+        print(
+            f"{name:>8} {cpu:>9.2f} {wall:>9.2f} {percentile(waits, 0.5) * 1000:>14.2f} {percentile(waits, 0.99) * 1000:>14.2f}"
+        )
+
+
+def bench_fuel_network(args) -> None:
+    """
+    Reserving and releasing electric slots across many stations through FuelNetwork against calling fuel_vehicle on each
+    station in turn until one has a free slot.
+    """
+    solution = load_solution("2_Fuel_Station_Design.py")
+    rng = random.Random(0)
+    # Keep the network nearly full so that a scan has to visit most stations to find a free slot
+    releases = [rng.random() for _ in range(args.operations)]
+
+    def run(reserve) -> float:
+        stations = [solution.FuelStation(electric=args.slots) for _ in range(args.stations)]
+        network = solution.FuelNetwork()
+        for station in stations:
+            network.add_station(station)
+        held = [reserve(stations, network) for _ in range(args.stations * args.slots - 1)]
+        started = time.perf_counter()
+        for chance in releases:
+            station_id, slot = held.pop(int(chance * len(held)))
+            stations[station_id].release_slot(slot)
+            held.append(reserve(stations, network))
+        return time.perf_counter() - started
+
+    def scan(stations, network):
+        for station_id, station in enumerate(stations):
+            slot = station.fuel_vehicle("electric")
+            if slot:
+                return station_id, slot
+
+    def indexed(stations, network):
+        return network.reserve("electric", policy=network.FIRST_AVAILABLE)
+
+    print(f"{args.stations} stations with {args.slots} electric slots, {args.operations} release/reserve pairs")
+    for name, reserve in (("scan", scan), ("index", indexed)):
+        seconds = run(reserve)
+        print(f"{name:>6}: {seconds:.2f} s, {args.operations / seconds:,.0f} reservations/s")
+
+
+def bench_fuel_simulate(args) -> None:
+    """
+    Simulating a day of arrivals with simulate against replaying it through FuelStation one call at a time, and a sweep
+    over slot counts on one process against a process pool.
+    """
+    solution = load_solution("2_Fuel_Station_Design.py")
+    rng = random.Random(0)
+    fuel_names = ("diesel", "petrol", "electric")
+    arrival_times = sorted(rng.uniform(0, 86_400) for _ in range(args.arrivals))
+    fuel_types = [rng.choice(fuel_names) for _ in range(args.arrivals)]
+    # Size the service times so that the slots are busy most of the day
+    mean_duration = 86_400 * args.slots * len(fuel_names) / args.arrivals
+    durations = [rng.expovariate(1 / mean_duration) for _ in range(args.arrivals)]
+    capacities = {name: args.slots for name in fuel_names}
+
+    started = time.perf_counter()
+    station = solution.FuelStation(**capacities)
+    departures = []
+    for arrival_time, fuel_type, duration in zip(arrival_times, fuel_types, durations):
+        while departures and departures[0][0] <= arrival_time:
+            station.open_fuel_slot(heapq.heappop(departures)[1])
+        if station.fuel_vehicle(fuel_type):
+            heapq.heappush(departures, (arrival_time + duration, fuel_type))
+    replayed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    result = solution.simulate(capacities, arrival_times, fuel_types, durations)
+    simulated = time.perf_counter() - started
+
+    print(f"{args.arrivals} arrivals, {args.slots} slots per fuel type")
+    print(f"  replay: {replayed:.2f} s")
+    print(f"simulate: {simulated:.2f} s (rejection rates {', '.join(f'{rate:.1%}' for rate in result.rejection_rate.values())})")
+
+    options = [{name: slots for name in fuel_names} for slots in range(1, args.sweep + 1)]
+    for processes in (1, args.processes or os.cpu_count()):
+        started = time.perf_counter()
+        solution.sweep(options, arrival_times, fuel_types, durations, processes=processes)
+        print(f"sweep of {args.sweep} slot counts on {processes} process(es): {time.perf_counter() - started:.2f} s")
+
+
+def bench_calendar_book(args) -> None:
+    """
+    Calendar.book with events booked in sorted, reverse-sorted and random order, against inserting into the original
+    unbalanced Node tree (only up to --tree-limit events, as sorted bookings make it quadratic).
+    """
+    solution = load_solution("3_Debug_Calendar_Design.py")
+    print(f"{'events':>9} {'order':>8} {'calendar (s)':>13} {'bytes/event':>12} {'node tree (s)':>14}")
+    for events in args.events:
+        for order in ("sorted", "reverse", "random"):
+            bookings = [(2 * number, 2 * number + 1) for number in range(events)]
+            if order == "reverse":
+                bookings.reverse()
+            elif order == "random":
+                random.Random(0).shuffle(bookings)
+
+            started = time.perf_counter()
+            calendar = solution.Calendar()
+            for start, end in bookings:
+                calendar.book(start, end)
+            seconds = time.perf_counter() - started
+            memory = sum(map(sys.getsizeof, calendar.starts + calendar.ends)) + sys.getsizeof(calendar.block_ends)
+
+            tree = "-"
+            if events <= args.tree_limit:
+                started = time.perf_counter()
+                root = solution.Node(*bookings[0])
+                for start, end in bookings[1:]:
+                    root.insert(solution.Node(start, end))
+                tree = f"{time.perf_counter() - started:.2f}"
+            print(f"{events:>9} {order:>8} {seconds:>13.2f} {memory / events:>12.1f} {tree:>14}")
+
+
+def bench_calendar_resources(args) -> None:
+    """
+    ResourceCalendar.book_any and find_all_free against trying Calendar.book on every resource until one accepts.
+    Meetings of 30 to 120 minutes start on quarter hours of a working week (in minutes).
+    """
+    solution = load_solution("3_Debug_Calendar_Design.py")
+    rng = random.Random(0)
+    requests = []
+    for _ in range(args.events):
+        day = rng.randrange(5)
+        start = day * 1440 + 480 + 15 * rng.randrange(36)  # 8:00 to 16:45
+        requests.append((start, start + rng.choice((30, 60, 90, 120))))
+
+    resources = solution.ResourceCalendar(range(args.resources), bucket_size=args.bucket_size)
+    started = time.perf_counter()
+    booked = sum(resources.book_any(start, end) is not None for start, end in requests)
+    seconds = time.perf_counter() - started
+    print(f"{args.resources} resources, {args.events} meeting requests, {booked} booked")
+    print(f"resource calendar book_any: {seconds:.2f} s, {args.events / seconds:,.0f} requests/s")
+
+    queries = requests[: args.events // 10]
+    started = time.perf_counter()
+    free = sum(len(resources.find_all_free(start, end)) for start, end in queries)
+    seconds = time.perf_counter() - started
+    print(f"resource calendar find_all_free: {len(queries) / seconds:,.0f} queries/s ({free / len(queries):,.0f} free on average)")
+
+    calendars = [solution.Calendar() for _ in range(args.resources)]
+    naive = requests[: args.naive_events]
+    started = time.perf_counter()
+    for start, end in naive:
+        for calendar in calendars:
+            if calendar.book(start, end):
+                break
+    seconds = time.perf_counter() - started
+    print(f"one calendar per resource, first {len(naive)} requests: {len(naive) / seconds:,.0f} requests/s")
+
+
+def bench_calendar_restart(args) -> None:
+    """
+    Opening a PersistentCalendar and answering queries right away, against rebuilding a Calendar by replaying every booking.
+    """
+    solution = load_solution("3_Debug_Calendar_Design.py")
+    bookings = [(10 * number, 10 * number + 5) for number in range(args.events)]
+    random.Random(0).shuffle(bookings)
+    queries = [(start + 3, start + 8) for start, _ in bookings[:1000]]
+    directory = None
+    path = args.path
+    if path is None:
+        directory = tempfile.TemporaryDirectory()
+        path = os.path.join(directory.name, "calendar")
+    try:
+        calendar = solution.PersistentCalendar(path, compact_after=args.events + 1)
+        started = time.perf_counter()
+        for start, end in bookings:
+            calendar.book(start, end)
+        logged = time.perf_counter() - started
+        started = time.perf_counter()
+        calendar.compact()
+        compacted = time.perf_counter() - started
+        calendar.close()
+        print(f"{args.events} events: logged in {logged:.2f} s, compacted in {compacted:.2f} s "
+              f"({os.path.getsize(path) / args.events:.0f} bytes/event on disk)")
+
+        started = time.perf_counter()
+        with solution.PersistentCalendar(path) as calendar:
+            opened = time.perf_counter() - started
+            answers = [calendar.is_free(start, end) for start, end in queries]
+            queried = time.perf_counter() - started
+        print(f"persistent calendar: open {opened * 1000:.2f} ms, open and {len(queries)} queries {queried * 1000:.2f} ms")
+
+        started = time.perf_counter()
+        calendar = solution.Calendar()
+        for start, end in bookings:
+            calendar.book(start, end)
+        assert answers == [calendar.is_free(start, end) for start, end in queries]
+        print(f"replaying book: {time.perf_counter() - started:.2f} s")
+    finally:
+        if directory is not None:
+            directory.cleanup()
+
+
+def zipf_strings(count: int, keys: int, exponent: float, rng: random.Random) -> list:
+    """
+    Returns `count` strings drawn from `keys` distinct ones with Zipf-distributed frequencies (key k has weight 1 / k^exponent).
+    """
+    weights = [1 / rank**exponent for rank in range(1, keys + 1)]
+    return [f"key-{rank}" for rank in rng.choices(range(keys), weights=weights, k=count)]
+
+
+def bursty_arrivals(count: int, rate: float, rng: random.Random) -> list:
+    """
+    Returns `count` arrival times of a Poisson process whose rate is ten times higher in the first minute of every
+    ten minutes (rush hours in miniature).
+    """
+    times = []
+    now = 0.0
+    for _ in range(count):
+        now += rng.expovariate(rate * 10 if now % 600 < 60 else rate)
+        times.append(now)
+    return times
+
+
+def workload_datastream_zipf(solution_modules: dict, size: int, rng: random.Random) -> tuple:
+    """
+    DataStream.should_output_data_str on Zipf-distributed strings, 1000 messages per second.
+    """
+    DataStream = solution_modules["datastream"].DataStream
+    strings = zipf_strings(size, max(size // 10, 1), 1.1, rng)
+    return DataStream, [("should_output_data_str", (number // 1000, string)) for number, string in enumerate(strings)]
+
+
+def workload_fuel_bursty(solution_modules: dict, size: int, rng: random.Random) -> tuple:
+    """
+    FuelStation.fuel_vehicle on bursty arrivals and open_fuel_slot when accepted vehicles leave.
+    """
+    FuelStation = solution_modules["fuel"].FuelStation
+    capacities = {"diesel": 8, "petrol": 8, "electric": 4}
+    fuel_names = list(capacities)
+    filled = dict.fromkeys(fuel_names, 0)
+    departures = []
+    operations = []
+    # The calls depend only on the capacities, so they are worked out once here rather than on every run
+    for arrival in bursty_arrivals(size // 2, 0.05, rng):
+        while departures and departures[0][0] <= arrival:
+            fuel_type = heapq.heappop(departures)[1]
+            filled[fuel_type] -= 1
+            operations.append(("open_fuel_slot", (fuel_type,)))
+        fuel_type = rng.choice(fuel_names)
+        operations.append(("fuel_vehicle", (fuel_type,)))
+        if filled[fuel_type] < capacities[fuel_type]:
+            filled[fuel_type] += 1
+            heapq.heappush(departures, (arrival + rng.expovariate(1 / 300), fuel_type))
+    return (lambda: FuelStation(**capacities)), operations
+
+
+def workload_calendar(order: str) -> callable:
+    """
+    Returns a workload of Calendar.book on bookings in the given order ("sorted" or "random"), about one in four
+    overlapping an earlier one.
+    """
+
+    def workload(solution_modules: dict, size: int, rng: random.Random) -> tuple:
+        bookings = [(10 * number, 10 * number + rng.choice((5, 10, 10, 15))) for number in range(size)]
+        if order == "random":
+            rng.shuffle(bookings)
+        return solution_modules["calendar"].Calendar, [("book", booking) for booking in bookings]
+
+    workload.__doc__ = f"Calendar.book on {order} bookings."
+    return workload
+
+
+WORKLOADS = {
+    "datastream-zipf": workload_datastream_zipf,
+    "fuel-bursty": workload_fuel_bursty,
+    "calendar-sorted": workload_calendar("sorted"),
+    "calendar-random": workload_calendar("random"),
+}
+
+
+def run_workload(factory, operations: list, instrumented: bool) -> dict:
+    """
+    Runs the operations on fresh objects from `factory`: once for throughput, once timing every call, once under
+    tracemalloc for peak memory and, optionally, twice instrumented (counting only, then counting and timing).
+    """
+    names = {name for name, _ in operations}
+
+    def replay(target) -> float:
+        methods = {name: getattr(target, name) for name in names}
+        started = time.perf_counter()
+        for name, arguments in operations:
+            methods[name](*arguments)
+        return time.perf_counter() - started
+
+    seconds = replay(factory())
+
+    target = factory()
+    methods = {name: getattr(target, name) for name in names}
+    clock = time.perf_counter_ns
+    latencies = []
+    for name, arguments in operations:
+        started = clock()
+        methods[name](*arguments)
+        latencies.append(clock() - started)
+
+    tracemalloc.start()
+    replay(factory())
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    result = {
+        "operations": len(operations),
+        "ops_per_sec": len(operations) / seconds,
+        "p50_us": percentile(latencies, 0.5) / 1000,
+        "p99_us": percentile(latencies, 0.99) / 1000,
+        "peak_memory_bytes": peak,
+    }
+    if instrumented:
+        target = factory()
+        probe = instrument(target)
+        result["counted_ops_per_sec"] = len(operations) / replay(target)
+        result["counters"] = probe.snapshot()
+        target = factory()
+        instrument(target, timing=True)
+        result["timed_ops_per_sec"] = len(operations) / replay(target)
+    return result
+
+
+def bench_suite(args) -> None:
+    """
+    Runs the synthetic workloads, prints ops/sec, p50/p99 latency and peak memory, and optionally saves the results as
+    JSON and compares them with an earlier run.
+    """
+    solution_modules = {
+        "datastream": load_solution("1_Data_Stream_Ingestion.py"),
+        "fuel": load_solution("2_Fuel_Station_Design.py"),
+        "calendar": load_solution("3_Debug_Calendar_Design.py"),
+    }
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)["results"]
+
+    results = {}
+    print(f"{'workload':>16} {'ops/sec':>12} {'p50 (us)':>9} {'p99 (us)':>9} {'peak (MiB)':>11} {'vs baseline':>12}")
+    for name in args.workloads:
+        factory, operations = WORKLOADS[name](solution_modules, args.size, random.Random(args.seed))
+        result = results[name] = run_workload(factory, operations, args.instrument)
+        change = ""
+        if name in baseline:
+            change = f"{result['ops_per_sec'] / baseline[name]['ops_per_sec']:.2f}x"
+        print(
+            f"{name:>16} {result['ops_per_sec']:>12,.0f} {result['p50_us']:>9.2f} {result['p99_us']:>9.2f} "
+            f"{result['peak_memory_bytes'] / 2**20:>11.1f} {change:>12}"
+        )
+        if args.instrument:
+            counted = result["counted_ops_per_sec"]
+            timed = result["timed_ops_per_sec"]
+            print(
+                f"{'':>16} instrumented: {counted:,.0f} ops/sec counting ({1 - counted / result['ops_per_sec']:.0%} overhead), "
+                f"{timed:,.0f} ops/sec counting and timing ({1 - timed / result['ops_per_sec']:.0%} overhead)"
+            )
+
+    if args.output:
+        report = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "size": args.size,
+            "seed": args.seed,
+            "results": results,
+        }
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"saved to {args.output}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    memory = commands.add_parser("datastream-memory", help="RSS of DataStream over a long run")
+    memory.add_argument("--events", type=int, default=20_000_000)
+    memory.add_argument("--keys-per-second", type=int, default=100_000)
+    memory.set_defaults(run=bench_datastream_memory)
+
+    batch = commands.add_parser("datastream-batch", help="should_output_batch against the scalar method")
+    batch.add_argument("--events", type=int, default=2_000_000)
+    batch.add_argument("--chunk", type=int, default=65_536)
+    batch.add_argument("--keys", type=int, default=100_000)
+    batch.set_defaults(run=bench_datastream_batch)
+
+    sharded = commands.add_parser("datastream-sharded", help="sharded DataStream at 1, 2, 4 and 8 workers")
+    sharded.add_argument("--events", type=int, default=2_000_000)
+    sharded.add_argument("--chunk", type=int, default=65_536)
+    sharded.add_argument("--keys", type=int, default=100_000)
+    sharded.set_defaults(run=bench_datastream_sharded)
+
+    compact = commands.add_parser("datastream-compact", help="memory and speed of the compact DataStream stores")
+    compact.add_argument("--events", type=int, default=2_000_000)
+    compact.add_argument("--keys-per-second", type=int, default=100_000)
+    compact.add_argument("--approximate-bytes", type=int, default=32 << 20)
+    compact.set_defaults(run=bench_datastream_compact)
+
+    restart = commands.add_parser("datastream-restart", help="DataStream snapshot/restore against replaying prints")
+    restart.add_argument("--keys", type=int, default=10_000_000)
+    restart.add_argument("--path", help="where to write the snapshot (default: a temporary file)")
+    restart.add_argument("--prefix-windows", action="store_true", help="configure per-prefix and per-string windows")
+    restart.set_defaults(run=bench_datastream_restart)
+
+    wait = commands.add_parser("fuel-wait", help="waiting for a FuelStation slot against polling for one")
+    wait.add_argument("--clients", type=int, default=32)
+    wait.add_argument("--slots", type=int, default=4)
+    wait.add_argument("--visits", type=int, default=100)
+    wait.add_argument("--hold", type=float, default=0.001)
+    wait.add_argument("--poll-interval", type=float, default=0.0)
+    wait.set_defaults(run=bench_fuel_wait)
+
+    network = commands.add_parser("fuel-network", help="FuelNetwork reservations against scanning every station")
+    network.add_argument("--stations", type=int, default=500)
+    network.add_argument("--slots", type=int, default=4)
+    network.add_argument("--operations", type=int, default=20_000)
+    network.set_defaults(run=bench_fuel_network)
+
+    simulation = commands.add_parser("fuel-simulate", help="simulate and sweep against replaying a trace through FuelStation")
+    simulation.add_argument("--arrivals", type=int, default=1_000_000)
+    simulation.add_argument("--slots", type=int, default=8)
+    simulation.add_argument("--sweep", type=int, default=8)
+    simulation.add_argument("--processes", type=int, default=0, help="worker processes for the sweep (default: CPUs)")
+    simulation.set_defaults(run=bench_fuel_simulate)
+
+    book = commands.add_parser("calendar-book", help="Calendar.book in sorted, reverse and random order")
+    book.add_argument("--events", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    book.add_argument("--tree-limit", type=int, default=10_000)
+    book.set_defaults(run=bench_calendar_book)
+
+    rooms = commands.add_parser("calendar-resources", help="ResourceCalendar against booking every calendar in turn")
+    rooms.add_argument("--resources", type=int, default=10_000)
+    rooms.add_argument("--events", type=int, default=100_000)
+    rooms.add_argument("--bucket-size", type=int, default=15)
+    rooms.add_argument("--naive-events", type=int, default=10_000)
+    rooms.set_defaults(run=bench_calendar_resources)
+
+    reopen = commands.add_parser("calendar-restart", help="PersistentCalendar cold start against replaying bookings")
+    reopen.add_argument("--events", type=int, default=1_000_000)
+    reopen.add_argument("--path", help="where to write the data file (default: a temporary directory)")
+    reopen.set_defaults(run=bench_calendar_restart)
+
+    suite = commands.add_parser("suite", help="ops/sec, latency and memory of every component on synthetic workloads")
+    suite.add_argument("--size", type=int, default=200_000, help="operations per workload")
+    suite.add_argument("--workloads", nargs="+", choices=list(WORKLOADS), default=list(WORKLOADS))
+    suite.add_argument("--seed", type=int, default=0)
+    suite.add_argument("--instrument", action="store_true", help="also run instrumented and report the overhead")
+    suite.add_argument("--output", help="save the results to this JSON file")
+    suite.add_argument("--compare", help="compare ops/sec with the results saved in this JSON file")
+    suite.set_defaults(run=bench_suite)
+
+    args = parser.parse_args(argv)
+    args.run(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""
+Optional counters and timing hooks for the hot methods of the assignment solutions.
+
+Nothing here is active unless `instrument` is called: it wraps the chosen methods of ONE object (by setting instance
+attributes that shadow the class methods), so other objects, and the solution modules themselves, pay nothing.
+An instrumented method counts its calls and its accepted (truthy) and rejected (falsy) results; for batch methods, which
+return a list of decisions, the accepted and rejected items of each batch are counted. Timing (the total and maximum
+time spent in each method) is opt-in, as two clock reads per call cost about as much as a fast method itself.
+Gauges (e.g. the number of live strings of a DataStream) are read only when a snapshot is taken, so they cost nothing
+per call.
+
+The counters are for diagnostics, not for leaving on in a hot production path: every call of an instrumented method goes
+through a Python-level wrapper, which costs about as much as one of the fast methods. `benchmarks.py suite --instrument`
+measures up to 25-50% lower throughput with counting only and 40-70% with timing. Instrument an object while profiling a
+workload or investigating a live process, then uninstall the probe.
+
+Usage:
+    stream = DataStream()
+    probe = instrument(stream)  # should_output_data_str and should_output_batch, plus the default DataStream gauges
+    ...
+    probe.snapshot()  # {"should_output_data_str": {"calls": ..., "accepted": ..., ...}, "gauges": {"strings": ...}}
+
+The counters are plain integers updated without a lock: under concurrent use they may miss a few updates, which is
+acceptable for monitoring and keeps the wrapper cheap.
+"""
+
+import time
+from typing import Callable, Iterable, Optional
+
+# Hot methods and gauges of each solution class, found by class name along the MRO of the instrumented object
+HOT_METHODS = {
+    "DataStream": ("should_output_data_str", "should_output_batch"),
+    "FuelStation": ("fuel_vehicle", "open_fuel_slot"),
+    "Calendar": ("book",),
+}
+BATCH_METHODS = {"should_output_batch"}  # Methods returning a list of decisions, counted per item
+GAUGES = {
+    "DataStream": {
+        "strings": lambda stream: len(stream.data),
+        "pending_expiries": lambda stream: sum(map(len, stream.expiry.values())),
+    },
+    "FuelStation": {
+        "occupied_slots": lambda station: sum(station.filled),
+        "vehicles": lambda station: len(station.vehicle_slot),
+    },
+    "Calendar": {
+        "events": len,
+        # The booking index is two levels deep: a binary search over the blocks, then one inside a block
+        "blocks": lambda calendar: len(calendar.starts),
+        "largest_block": lambda calendar: max(map(len, calendar.starts), default=0),
+    },
+}
+
+
+class Probe:
+    """
+    The counters of one instrumented object.
+    Each method's counters are a list [calls, accepted, rejected, total nanoseconds, maximum nanoseconds].
+    """
+
+    def __init__(self, target, gauges: dict):
+        self.target = target  # The instrumented object
+        self.gauges = gauges  # Gauge name -> callable(target)
+        self.counters = {}  # Method name -> counters
+
+    def snapshot(self) -> dict:
+        """
+        Returns the current counters and gauge values as plain numbers (e.g. for a metrics endpoint).
+        """
+        snapshot = {}
+        for name, (calls, accepted, rejected, total, maximum) in self.counters.items():
+            snapshot[name] = {
+                "calls": calls,
+                "accepted": accepted,
+                "rejected": rejected,
+                "total_seconds": total / 1e9,
+                "mean_seconds": total / calls / 1e9 if calls else 0.0,
+                "max_seconds": maximum / 1e9,
+            }
+        snapshot["gauges"] = {name: gauge(self.target) for name, gauge in self.gauges.items()}
+        return snapshot
+
+    def reset(self) -> None:
+        """
+        Sets every counter back to zero.
+        """
+        for counters in self.counters.values():
+            counters[:] = [0, 0, 0, 0, 0]
+
+    def uninstall(self) -> None:
+        """
+        Removes the wrappers, so the object calls its class methods directly again.
+        """
+        for name in self.counters:
+            self.target.__dict__.pop(name, None)
+
+
+def instrument(
+    target, methods: Optional[Iterable[str]] = None, gauges: Optional[dict] = None, timing: bool = False
+) -> Probe:
+    """
+    Wraps methods of an object with counters (and timers).
+    Arguments:
+        target -- the object to instrument; it must have a __dict__ (so not a class using __slots__ only)
+        methods -- the method names to wrap (default: the HOT_METHODS of the object's classes)
+        gauges -- gauge name -> callable(target) read at snapshot time (default: the GAUGES of the object's classes)
+        timing -- whether to also time every call (two clock reads per call; off by default)
+    Returns:
+        Probe -- the counters of the object
+    """
+    classes = [cls.__name__ for cls in type(target).__mro__]
+    if methods is None:
+        methods = [name for cls in classes for name in HOT_METHODS.get(cls, ())]
+    if gauges is None:
+        gauges = {}
+        for cls in reversed(classes):
+            gauges.update(GAUGES.get(cls, {}))
+    probe = Probe(target, gauges)
+    for name in dict.fromkeys(methods):
+        counters = probe.counters[name] = [0, 0, 0, 0, 0]
+        setattr(target, name, _wrap(getattr(target, name), counters, timing, name in BATCH_METHODS))
+    return probe
+
+
+def _wrap(method: Callable, counters: list, timing: bool, batch: bool) -> Callable:
+    """
+    Returns a wrapper of a bound method that updates `counters` on every call.
+    A batch method's result is a sequence of decisions, whose true and false items count as accepted and rejected.
+    """
+    if batch:
+        def counted(*args, **kwargs):
+            result = method(*args, **kwargs)
+            # A list, or a NumPy array of booleans: both are counted in C
+            accepted = result.count(True) if isinstance(result, list) else int(result.sum())
+            counters[0] += 1
+            counters[1] += accepted
+            counters[2] += len(result) - accepted
+            return result
+    else:
+        def counted(*args, **kwargs):
+            result = method(*args, **kwargs)
+            counters[0] += 1
+            counters[1 if result else 2] += 1
+            return result
+
+    if not timing:
+        return counted
+
+    clock = time.perf_counter_ns
+
+    def timed(*args, **kwargs):
+        started = clock()
+        result = counted(*args, **kwargs)
+        elapsed = clock() - started
+        counters[3] += elapsed
+        if elapsed > counters[4]:
+            counters[4] = elapsed
+        return result
+
+    return timed